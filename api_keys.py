@@ -0,0 +1,50 @@
+"""API keys, to protect administrative path operations (and to identify clients).
+
+`APIKeys` is a set of valid keys. It only keeps a SHA-256 digest of each key, and checks a key
+by looking up its digest, so the time it takes doesn't depend on how much of a valid key the
+given one matches.
+
+The keys usually come from an environment variable, with the keys separated by commas (e.g.
+`ADMIN_API_KEYS=key1,key2`), see `APIKeys.from_env()`. When the variable is not set there are
+no valid keys, and every request is rejected.
+
+`RequireAPIKey` is a dependency that rejects the requests without a valid key in the `X-API-Key`
+header with a `403 Forbidden`, and returns the key otherwise.
+"""
+
+import hashlib
+import os
+from typing import Iterable, Optional
+
+from fastapi import HTTPException, Security, status
+from fastapi.security import APIKeyHeader
+
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+
+
+class APIKeys:
+    def __init__(self, keys: Iterable[str]):
+        self.digests = {self.digest(key) for key in keys if key}
+
+    @classmethod
+    def from_env(cls, name: str) -> "APIKeys":
+        return cls(key.strip() for key in os.environ.get(name, "").split(","))
+
+    @staticmethod
+    def digest(key: str) -> bytes:
+        return hashlib.sha256(key.encode()).digest()
+
+    def is_valid(self, key: Optional[str]) -> bool:
+        return bool(key) and self.digest(key) in self.digests
+
+
+class RequireAPIKey:
+    def __init__(self, keys: APIKeys):
+        self.keys = keys
+
+    async def __call__(self, key: Optional[str] = Security(api_key_header)) -> str:
+        if not self.keys.is_valid(key):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Invalid API key"
+            )
+        return key
@@ -0,0 +1,186 @@
+"""HTTP Basic verification against password hashes, with a cache and lockout.
+
+With HTTP Basic, the client sends the password with every request. If the password is stored
+as a salted hash (as it should), every request pays for the (deliberately slow) hash function.
+
+`BasicAuthVerifier` remembers, for a short time, the credentials that were verified: not the
+password, but an HMAC of it (with a key that only lives in this process). The next requests
+with the same credentials only compute the HMAC and compare it, in constant time, with
+`secrets.compare_digest()`. The stored hash is part of the HMAC, so when the password changes
+the old credentials stop matching.
+
+It also counts the failures per user and per client IP, and after too many of them in a time
+window, it locks the user (or IP) out for a while: those requests get a `429 Too Many Requests`
+without even running the hash function.
+
+Unknown users are checked against a dummy hash, so they take as long as known ones.
+"""
+
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPBasic, HTTPBasicCredentials
+
+security = HTTPBasic()
+
+
+class CachedCredentials(NamedTuple):
+    mac: bytes
+    expires_at: float
+
+
+class FailureTracker:
+    """
+    Failures per key (a username or an IP), locking the key out after `max_failures`.
+    """
+
+    def __init__(
+        self,
+        max_failures: int,
+        window: float = 300.0,
+        lockout: float = 300.0,
+        max_keys: int = 100_000,
+    ):
+        self.max_failures = max_failures
+        self.window = window
+        self.lockout = lockout
+        self.max_keys = max_keys
+        # Key -> (failures, time of the first one)
+        self.failures: Dict[str, Tuple[int, float]] = {}
+        self.locked_until: Dict[str, float] = {}
+
+    def retry_after(self, key: str, now: float) -> float:
+        """
+        Seconds until `key` is allowed again, 0 if it's not locked out.
+        """
+        until = self.locked_until.get(key)
+        if until is None:
+            return 0
+        if until <= now:
+            del self.locked_until[key]
+            return 0
+        return until - now
+
+    def fail(self, key: str, now: float) -> None:
+        count, first = self.failures.get(key, (0, now))
+        if now - first > self.window:
+            count, first = 0, now
+        count += 1
+        if count >= self.max_failures:
+            self.failures.pop(key, None)
+            self.locked_until[key] = now + self.lockout
+        else:
+            self.failures[key] = (count, first)
+        if len(self.failures) + len(self.locked_until) > self.max_keys:
+            self.prune(now)
+
+    def reset(self, key: str) -> None:
+        self.failures.pop(key, None)
+
+    def prune(self, now: float) -> None:
+        self.failures = {
+            key: (count, first)
+            for key, (count, first) in self.failures.items()
+            if now - first <= self.window
+        }
+        self.locked_until = {
+            key: until for key, until in self.locked_until.items() if until > now
+        }
+
+
+class BasicAuthVerifier:
+    """
+    A dependency that returns the username, if the HTTP Basic credentials are correct.
+
+    `get_password_hash(username)` returns the stored hash (or `None` for unknown users) and
+    `verify_password(password, password_hash)` checks a password against it.
+    """
+
+    def __init__(
+        self,
+        get_password_hash: Callable[[str], Optional[str]],
+        verify_password: Callable[[str, str], bool],
+        dummy_hash: str,
+        cache_ttl: float = 60.0,
+        max_cached: int = 10_000,
+        max_user_failures: int = 5,
+        max_ip_failures: int = 20,
+        failure_window: float = 300.0,
+        lockout: float = 300.0,
+    ):
+        self.get_password_hash = get_password_hash
+        self.verify_password = verify_password
+        self.dummy_hash = dummy_hash
+        self.cache_ttl = cache_ttl
+        self.max_cached = max_cached
+        self.key = secrets.token_bytes(32)
+        self.cache: "OrderedDict[str, CachedCredentials]" = OrderedDict()
+        self.user_failures = FailureTracker(max_user_failures, failure_window, lockout)
+        self.ip_failures = FailureTracker(max_ip_failures, failure_window, lockout)
+        # Normal `def` dependencies are run in the threadpool
+        self.lock = threading.Lock()
+
+    def mac(self, username: str, password: str, password_hash: str) -> bytes:
+        message = "\0".join((username, password_hash, password)).encode("utf8")
+        return hmac.new(self.key, message, hashlib.sha256).digest()
+
+    def invalidate(self, username: Optional[str] = None) -> None:
+        with self.lock:
+            if username is None:
+                self.cache.clear()
+            else:
+                self.cache.pop(username, None)
+
+    def __call__(
+        self, request: Request, credentials: HTTPBasicCredentials = Depends(security)
+    ) -> str:
+        username = credentials.username
+        client_ip = request.client.host if request.client else ""
+        now = time.monotonic()
+        with self.lock:
+            retry_after = max(
+                self.user_failures.retry_after(username, now),
+                self.ip_failures.retry_after(client_ip, now),
+            )
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many failed attempts",
+                headers={"Retry-After": str(int(retry_after) + 1)},
+            )
+        password_hash = self.get_password_hash(username)
+        if password_hash is not None:
+            mac = self.mac(username, credentials.password, password_hash)
+            with self.lock:
+                cached = self.cache.get(username)
+            if (
+                cached is not None
+                and cached.expires_at > now
+                and secrets.compare_digest(cached.mac, mac)
+            ):
+                return username
+            if self.verify_password(credentials.password, password_hash):
+                with self.lock:
+                    self.cache[username] = CachedCredentials(mac, now + self.cache_ttl)
+                    self.cache.move_to_end(username)
+                    while len(self.cache) > self.max_cached:
+                        self.cache.popitem(last=False)
+                    self.user_failures.reset(username)
+                return username
+        else:
+            # As slow as for a known user, not to reveal which usernames exist
+            self.verify_password(credentials.password, self.dummy_hash)
+        with self.lock:
+            self.user_failures.fail(username, now)
+            self.ip_failures.fail(client_ip, now)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Basic"},
+        )
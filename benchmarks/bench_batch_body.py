@@ -0,0 +1,104 @@
+"""`List[Item]` bodies vs `BatchBody`, with 100k items.
+
+Measures the validation alone (a `List[Item]` field, as FastAPI validates the body, vs the
+`BatchValidator` building `Item` instances or named tuples), and whole requests to the
+`/authors/{author_id}/items/` and `/authors/{author_id}/items/bulk` path operations of
+`main39.py`, over ASGI.
+
+Run it from the root of the project with:
+
+    python -m benchmarks.bench_batch_body
+"""
+
+import asyncio
+import json
+import time
+from typing import List
+
+from fastapi.utils import create_response_field
+
+import main39
+from batch_body import BatchValidator
+
+ITEMS = 100_000
+ROUNDS = 3
+
+
+def make_items() -> list:
+    return [
+        {"name": f"item-{i}", "description": None if i % 2 else f"description {i}"}
+        for i in range(ITEMS)
+    ]
+
+
+def best_of(func) -> float:
+    times = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+async def post(path: str, body: bytes) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"bench"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 12345),
+        "server": ("bench", 80),
+    }
+    chunks = [body[i : i + 65536] for i in range(0, len(body), 65536)]
+    status = None
+
+    async def receive():
+        chunk = chunks.pop(0)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await main39.app(scope, receive, send)
+    return status
+
+
+def main():
+    items = make_items()
+    field = create_response_field("items", List[main39.Item])
+    _, errors = field.validate(items, {}, loc=("body",))
+    assert not errors
+
+    print(f"Validating {ITEMS} items:")
+    results = {
+        "List[Item]": best_of(lambda: field.validate(items, {}, loc=("body",))),
+        "BatchValidator": best_of(lambda: BatchValidator(main39.Item).validate(items)),
+        "BatchValidator, records": best_of(
+            lambda: BatchValidator(main39.Item, records=True).validate(items)
+        ),
+    }
+    for name, seconds in results.items():
+        print(f"{name:>26} {seconds * 1e3:>9.1f} ms")
+
+    body = json.dumps(items).encode()
+    print(f"Whole requests, {len(body) / 1e6:.1f} MB body:")
+    for path in ["/authors/bench/items/", "/authors/bench/items/bulk"]:
+        assert asyncio.run(post(path, body)) == 200
+        seconds = best_of(lambda: asyncio.run(post(path, body)))
+        print(f"{path:>26} {seconds * 1e3:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
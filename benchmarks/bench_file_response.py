@@ -0,0 +1,100 @@
+"""File serving throughput: `FileResponse` against `ZeroCopyFileResponse`.
+
+Serves a multi-GB file in-process over ASGI three ways:
+
+- `FileResponse`: the default, opens and reads the file for every request.
+- `ZeroCopyFileResponse` without server support: cached open file, `os.pread()` chunks.
+- `ZeroCopyFileResponse` with the `http.response.zerocopysend` extension: here the fake
+server does what a real one would, it calls `os.sendfile()` (to `/dev/null`).
+
+The file is created sparse by default, so this measures the serving overhead rather than the
+disk. Pass `--dense` to write real data first.
+
+Run it from the root of the project with:
+
+    python -m benchmarks.bench_file_response --size-mb 4096
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from fastapi.responses import FileResponse
+
+from zerocopy_file import ZEROCOPY_EXTENSION, ZeroCopyFileResponse
+
+
+def make_file(directory: str, size: int, dense: bool) -> str:
+    path = os.path.join(directory, "large-file.bin")
+    with open(path, mode="wb") as file:
+        if dense:
+            block = os.urandom(1024 * 1024)
+            for _ in range(size // len(block)):
+                file.write(block)
+        file.truncate(size)
+    return path
+
+
+async def serve(response, zerocopy: bool) -> int:
+    scope = {"type": "http", "method": "GET", "headers": []}
+    if zerocopy:
+        scope["extensions"] = {ZEROCOPY_EXTENSION: {}}
+    sent = 0
+    devnull = os.open(os.devnull, os.O_WRONLY)
+
+    async def receive():
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal sent
+        if message["type"] == "http.response.body":
+            sent += len(message.get("body", b""))
+        elif message["type"] == ZEROCOPY_EXTENSION:
+            offset, count = message["offset"], message["count"]
+            fd = message["file"].fileno()
+            while count:
+                written = os.sendfile(devnull, fd, offset, count)
+                offset += written
+                count -= written
+                sent += written
+
+    try:
+        await response(scope, receive, send)
+    finally:
+        os.close(devnull)
+    return sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--requests", type=int, default=3)
+    parser.add_argument("--dense", action="store_true")
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    with tempfile.TemporaryDirectory() as directory:
+        path = make_file(directory, size, args.dense)
+        cases = [
+            ("FileResponse", lambda: FileResponse(path), False),
+            ("ZeroCopyFileResponse (pread)", lambda: ZeroCopyFileResponse(path), False),
+            (
+                "ZeroCopyFileResponse (sendfile)",
+                lambda: ZeroCopyFileResponse(path),
+                True,
+            ),
+        ]
+        for name, make_response, zerocopy in cases:
+            started = time.perf_counter()
+            for _ in range(args.requests):
+                assert asyncio.run(serve(make_response(), zerocopy)) == size
+            elapsed = time.perf_counter() - started
+            throughput = size * args.requests / elapsed / 1024**3
+            print(f"{name:>32}: {throughput:>7.2f} GiB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""JSON response classes: `JSONResponse`, `UJSONResponse` and `ORJSONResponse`.
+
+Drives the example apps in-process, calling them directly over ASGI (no server, no sockets),
+with payloads from 100 B to 50 MB in a few shapes:
+
+- `flat`: a list of small flat objects.
+- `deep`: a list of objects nested 20 levels deep.
+- `datetime`: a list of objects that are mostly `datetime` values.
+
+Each app gets a `/bench/{shape}/{size}` path operation that returns the payload the same way the
+example does (e.g. `main11.py` returns an `ORJSONResponse` directly, `main22.py` relies on the
+`default_response_class`). For each combination it measures the throughput, the p50/p99
+latency and the memory allocated per request (the peak traced by `tracemalloc`, in a separate
+pass, as tracing slows everything down).
+
+The results are written as JSON, to compare runs and catch regressions.
+
+Run it from the root of the project with:
+
+    python -m benchmarks.bench_json_backends --output bench_json_backends.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+SIZES = [100, 10_000, 1_000_000, 50_000_000]
+SHAPES = ["flat", "deep", "datetime"]
+# Stop measuring a combination after this many seconds (but always do a few requests)
+TIME_BUDGET = 2.0
+MIN_REQUESTS = 3
+MAX_REQUESTS = 1_000
+
+
+def flat_element(i: int) -> dict:
+    return {"id": i, "name": f"item-{i}", "price": 10.5, "in_stock": True}
+
+
+def deep_element(i: int) -> dict:
+    element: Dict[str, Any] = {"id": i}
+    for depth in range(20):
+        element = {"depth": depth, "child": element}
+    return element
+
+
+def datetime_element(i: int) -> dict:
+    start = datetime(2022, 1, 1) + timedelta(seconds=i)
+    return {
+        "id": i,
+        "created": start,
+        "updated": start + timedelta(hours=1),
+        "history": [start + timedelta(days=day) for day in range(5)],
+    }
+
+
+ELEMENTS: Dict[str, Callable[[int], dict]] = {
+    "flat": flat_element,
+    "deep": deep_element,
+    "datetime": datetime_element,
+}
+
+
+def make_payload(shape: str, size: int) -> List[dict]:
+    """
+    A list of elements of the given shape, about `size` bytes once serialized.
+    """
+    make_element = ELEMENTS[shape]
+    element_size = len(json.dumps(make_element(0), default=str))
+    return [make_element(i) for i in range(max(1, size // element_size))]
+
+
+def add_bench_route(app: FastAPI, response_class: Any, direct: bool = False) -> None:
+    payloads: Dict[Tuple[str, int], List[dict]] = {}
+
+    def get_payload(shape: str, size: int) -> List[dict]:
+        if (shape, size) not in payloads:
+            payloads.clear()
+            payloads[(shape, size)] = make_payload(shape, size)
+        return payloads[(shape, size)]
+
+    if direct:
+
+        async def bench(shape: str, size: int):
+            return response_class(get_payload(shape, size))
+
+    else:
+
+        async def bench(shape: str, size: int):
+            return get_payload(shape, size)
+
+    route_options = {"response_class": response_class} if response_class else {}
+    app.add_api_route("/bench/{shape}/{size}", bench, **route_options)
+
+
+def load_backends() -> Dict[str, FastAPI]:
+    backends: Dict[str, FastAPI] = {}
+
+    json_app = FastAPI()
+    add_bench_route(json_app, JSONResponse)
+    backends["json"] = json_app
+
+    try:
+        import ujson  # noqa: F401
+
+        import main16
+    except ImportError:
+        print("ujson is not installed, skipping UJSONResponse")
+    else:
+        add_bench_route(main16.app, main16.UJSONResponse)
+        backends["ujson"] = main16.app
+
+    import main11
+    import main21
+    import main22
+
+    add_bench_route(main11.app, ORJSONResponse, direct=True)
+    backends["orjson-direct"] = main11.app
+    add_bench_route(main22.app, None)
+    backends["orjson-default"] = main22.app
+    add_bench_route(main21.app, main21.CustomORJSONResponse)
+    backends["orjson-indent-2"] = main21.app
+    return backends
+
+
+async def request(app: FastAPI, path: str) -> int:
+    """
+    Call the app over ASGI, return the size of the response body.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 12345),
+        "server": ("bench", 80),
+    }
+    body_size = 0
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal body_size, status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body_size += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    assert status == 200, f"{path} returned {status}"
+    return body_size
+
+
+async def measure(app: FastAPI, shape: str, size: int) -> Dict[str, Any]:
+    path = f"/bench/{shape}/{size}"
+    # Warm up: builds the payload and any per-route caches
+    body_size = await request(app, path)
+
+    latencies: List[float] = []
+    started = time.perf_counter()
+    while len(latencies) < MAX_REQUESTS and (
+        len(latencies) < MIN_REQUESTS or time.perf_counter() - started < TIME_BUDGET
+    ):
+        before = time.perf_counter()
+        await request(app, path)
+        latencies.append(time.perf_counter() - before)
+    elapsed = sum(latencies)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    await request(app, path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "shape": shape,
+        "size": size,
+        "body_bytes": body_size,
+        "requests": len(latencies),
+        "requests_per_second": len(latencies) / elapsed,
+        "bytes_per_second": body_size * len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1e3,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e3,
+        "allocated_bytes": peak - baseline,
+    }
+
+
+async def run(backends: Dict[str, FastAPI], shapes: List[str], sizes: List[int]):
+    results = []
+    for name, app in backends.items():
+        for shape in shapes:
+            for size in sizes:
+                result = {"backend": name, **await measure(app, shape, size)}
+                print(
+                    f"{name:>16} {shape:>9} {size:>10} B "
+                    f"p50 {result['p50_ms']:>9.3f} ms  p99 {result['p99_ms']:>9.3f} ms  "
+                    f"{result['bytes_per_second'] / 1e6:>8.1f} MB/s  "
+                    f"alloc {result['allocated_bytes'] / 1e6:>8.2f} MB"
+                )
+                results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="bench_json_backends.json")
+    parser.add_argument("--shapes", nargs="+", default=SHAPES, choices=SHAPES)
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--backends", nargs="+")
+    args = parser.parse_args()
+
+    backends = load_backends()
+    if args.backends:
+        backends = {name: backends[name] for name in args.backends}
+    results = asyncio.run(run(backends, args.shapes, args.sizes))
+
+    import fastapi
+    import orjson
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "versions": {"fastapi": fastapi.__version__, "orjson": orjson.__version__},
+        "results": results,
+    }
+    with open(args.output, mode="w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
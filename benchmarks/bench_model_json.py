@@ -0,0 +1,70 @@
+"""Model serialization: `jsonable_encoder` + `JSONResponse` against `ModelJSONResponse`.
+
+Serializes a large nested model (with `datetime` and `UUID` fields) both ways and checks that
+they produce the same JSON.
+
+Run it from the root of the project with:
+
+    python -m benchmarks.bench_model_json
+"""
+
+import json
+import timeit
+from datetime import datetime, timedelta
+from typing import List
+from uuid import UUID, uuid4
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from main9 import Item, ModelJSONResponse
+
+ITEM_COUNTS = [10, 1_000, 10_000]
+
+
+class Revision(BaseModel):
+    id: UUID
+    item: Item
+    tags: List[str]
+
+
+class Catalog(BaseModel):
+    name: str
+    revisions: List[Revision]
+
+
+def make_catalog(item_count: int) -> Catalog:
+    start = datetime(2022, 1, 1)
+    return Catalog(
+        name="catalog",
+        revisions=[
+            Revision(
+                id=uuid4(),
+                item=Item(title=f"Item {i}", timestamp=start + timedelta(seconds=i)),
+                tags=["a", "b", "c"],
+            )
+            for i in range(item_count)
+        ],
+    )
+
+
+def main():
+    print(f"{'items':>8} {'encoder (ms)':>14} {'direct (ms)':>12} {'speedup':>8}")
+    for item_count in ITEM_COUNTS:
+        catalog = make_catalog(item_count)
+        expected = JSONResponse(jsonable_encoder(catalog)).body
+        assert json.loads(ModelJSONResponse(catalog).body) == json.loads(expected)
+        number = max(1, 10_000 // item_count)
+        encoder = timeit.timeit(
+            lambda: JSONResponse(jsonable_encoder(catalog)), number=number
+        )
+        direct = timeit.timeit(lambda: ModelJSONResponse(catalog), number=number)
+        print(
+            f"{item_count:>8} {encoder / number * 1e3:>14.3f} "
+            f"{direct / number * 1e3:>12.3f} {encoder / direct:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Blocklist checks: one `FixedContentQueryChecker` per pattern vs `MultiPatternQueryChecker`.
+
+Checks a query of a few hundred characters (with a couple of the patterns in it) against
+blocklists of random words, and prints the time per check and the time to compile the
+automaton.
+
+Run it from the root of the project with:
+
+    python -m benchmarks.bench_multi_pattern
+"""
+
+import random
+import string
+import time
+import timeit
+
+from main32 import FixedContentQueryChecker, MultiPatternQueryChecker
+
+PATTERN_COUNTS = [10, 1_000, 100_000]
+QUERY_LENGTH = 300
+NUMBER = 100
+
+
+def make_patterns(count: int) -> list:
+    rng = random.Random(count)
+    return [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(6, 12)))
+        for _ in range(count)
+    ]
+
+
+def make_query(patterns: list) -> str:
+    rng = random.Random(0)
+    words = rng.choices(string.ascii_lowercase + " ", k=QUERY_LENGTH)
+    return "".join(words) + " " + " ".join(rng.sample(patterns, 2))
+
+
+def naive_check(checkers: list, q: str) -> list:
+    return [checker.fixed_content for checker in checkers if checker(q)]
+
+
+def main():
+    print(
+        f"{'patterns':>9} {'naive (us)':>12} {'automaton (us)':>15} {'compile (ms)':>13}"
+    )
+    for count in PATTERN_COUNTS:
+        patterns = make_patterns(count)
+        q = make_query(patterns)
+        checkers = [FixedContentQueryChecker(pattern) for pattern in patterns]
+        started = time.perf_counter()
+        multi_checker = MultiPatternQueryChecker(patterns)
+        compile_time = time.perf_counter() - started
+        assert sorted(naive_check(checkers, q)) == sorted(multi_checker(q))
+        number = max(1, NUMBER * 100 // count)
+        naive = timeit.timeit(lambda: naive_check(checkers, q), number=number)
+        automaton = timeit.timeit(lambda: multi_checker(q), number=NUMBER)
+        print(
+            f"{count:>9} {naive / number * 1e6:>12.1f} "
+            f"{automaton / NUMBER * 1e6:>15.1f} {compile_time * 1e3:>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
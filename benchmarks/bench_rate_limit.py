@@ -0,0 +1,78 @@
+"""Rate limiter overhead per request, with 1M distinct keys.
+
+Fills each limiter with 1M keys (like 1M client IPs), then measures `hit()` for keys that are
+already there, picked at random, and for new keys. Also reports the memory used per key by the
+in-process limiters (traced with `tracemalloc`).
+
+Run it from the root of the project with:
+
+    python -m benchmarks.bench_rate_limit
+"""
+
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from rate_limit import (
+    SharedTokenBucketLimiter,
+    SlidingWindowLimiter,
+    TokenBucketLimiter,
+)
+
+KEYS = 1_000_000
+NUMBER = 200_000
+
+
+def make_key(i: int) -> str:
+    return f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+
+
+def measure(name: str, limiter, trace_memory: bool = True) -> None:
+    keys = [make_key(i) for i in range(KEYS)]
+    now = time.monotonic()
+    if trace_memory:
+        tracemalloc.start()
+    for key in keys:
+        limiter.hit(key, now)
+    if trace_memory:
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    per_key = f"{memory / KEYS:>7.0f} B" if trace_memory else f"{'-':>9}"
+    random.seed(0)
+    existing = random.choices(keys, k=NUMBER)
+    started = time.perf_counter()
+    for key in existing:
+        limiter.hit(key)
+    hit_existing = (time.perf_counter() - started) / NUMBER
+    new = [make_key(KEYS + i) for i in range(NUMBER)]
+    started = time.perf_counter()
+    for key in new:
+        limiter.hit(key)
+    hit_new = (time.perf_counter() - started) / NUMBER
+    print(
+        f"{name:>14} {hit_existing * 1e6:>13.2f} {hit_new * 1e6:>13.2f} {per_key:>12}"
+    )
+
+
+def main():
+    print(
+        f"{'limiter':>14} {'existing (us)':>13} {'new key (us)':>13} {'memory/key':>12}"
+    )
+    measure("token bucket", TokenBucketLimiter(rate=10, burst=20, max_keys=2 * KEYS))
+    measure(
+        "sliding window",
+        SlidingWindowLimiter(limit=100, window=60, max_keys=2 * KEYS),
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        shared = SharedTokenBucketLimiter(
+            "bench", rate=10, burst=20, slots=2 * KEYS, directory=directory
+        )
+        measure("shared bucket", shared, trace_memory=False)
+        shared.close()
+        os.remove(shared.path)
+
+
+if __name__ == "__main__":
+    main()
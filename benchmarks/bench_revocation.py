@@ -0,0 +1,61 @@
+"""Per-request overhead of checking tokens against the revocation list.
+
+For revocation lists of different sizes, measures checking a token that isn't revoked (the
+common case, answered by the Bloom filter) and one that is (the filter, and then the SQLite
+store), compared with querying the store directly on every request.
+
+Run it from the root of the project with:
+
+    python -m benchmarks.bench_revocation
+"""
+
+import os
+import tempfile
+import time
+import timeit
+from uuid import uuid4
+
+from token_revocation import RevocationList
+
+REVOKED_COUNTS = [0, 1_000, 100_000]
+NUMBER = 20_000
+
+
+def check(revocations: RevocationList, jti: str) -> bool:
+    # What `is_revoked()` does, without the event loop and the worker thread
+    return revocations.might_be_revoked(jti) and revocations.lookup(jti)
+
+
+def main():
+    print(
+        f"{'revoked':>8} {'valid, filter (us)':>19} {'revoked, filter+store (us)':>27} "
+        f"{'store only (us)':>16} {'filter KiB':>11}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for count in REVOKED_COUNTS:
+            revocations = RevocationList(os.path.join(directory, f"{count}.db"))
+            expires_at = time.time() + 3600
+            with revocations.connection:
+                revocations.connection.executemany(
+                    "INSERT INTO revoked_tokens (jti, expires_at) VALUES (?, ?)",
+                    ((uuid4().hex, expires_at) for _ in range(count)),
+                )
+            revoked = uuid4().hex
+            revocations.revoke(revoked, expires_at)
+            revocations.purge()
+            valid = uuid4().hex
+            assert not check(revocations, valid)
+            assert check(revocations, revoked)
+            filtered = timeit.timeit(lambda: check(revocations, valid), number=NUMBER)
+            hit = timeit.timeit(lambda: check(revocations, revoked), number=NUMBER)
+            store = timeit.timeit(lambda: revocations.lookup(valid), number=NUMBER)
+            print(
+                f"{count:>8} {filtered / NUMBER * 1e6:>19.2f} "
+                f"{hit / NUMBER * 1e6:>27.2f} {store / NUMBER * 1e6:>16.2f} "
+                f"{len(revocations.filter.bits) / 1024:>11.0f}"
+            )
+            revocations.connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Route lookup time against route count.
+
+Compares the default router (checking every route's regex in order) with the compiled radix
+tree from `radix_router.py`, for the last declared route, which is the worst case for the
+default router.
+
+Run it from the root of the project with:
+
+    python -m benchmarks.bench_router
+"""
+
+import timeit
+
+from fastapi import FastAPI
+from starlette.routing import Match
+
+from radix_router import RadixRouteIndex
+
+ROUTE_COUNTS = [10, 100, 1_000, 2_000, 5_000]
+NUMBER = 1_000
+
+
+def make_app(route_count: int) -> FastAPI:
+    app = FastAPI()
+    for i in range(route_count):
+        if i % 2:
+            path = f"/resource{i}/{{item_id:int}}"
+        else:
+            path = f"/resource{i}/items/"
+
+        async def endpoint():
+            return {}
+
+        app.add_api_route(path, endpoint, methods=["GET"], name=f"endpoint{i}")
+    return app
+
+
+def linear_lookup(routes, scope):
+    for route in routes:
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            return route
+
+
+def radix_lookup(routes, index, scope):
+    for position in index.lookup(scope["path"], scope["method"]):
+        match, child_scope = routes[position].matches(scope)
+        if match == Match.FULL:
+            return routes[position]
+
+
+def main():
+    print(f"{'routes':>8} {'linear (us)':>12} {'radix (us)':>12}")
+    for route_count in ROUTE_COUNTS:
+        routes = make_app(route_count).router.routes
+        index = RadixRouteIndex(routes)
+        last = route_count - 1
+        path = f"/resource{last}/42" if last % 2 else f"/resource{last}/items/"
+        scope = {"type": "http", "method": "GET", "path": path}
+        assert linear_lookup(routes, scope) is radix_lookup(routes, index, scope)
+        linear = timeit.timeit(lambda: linear_lookup(routes, scope), number=NUMBER)
+        radix = timeit.timeit(lambda: radix_lookup(routes, index, scope), number=NUMBER)
+        print(
+            f"{route_count:>8} {linear / NUMBER * 1e6:>12.2f} "
+            f"{radix / NUMBER * 1e6:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
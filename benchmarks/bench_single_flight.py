@@ -0,0 +1,79 @@
+"""Concurrent get-or-create requests for the same ID, with and without `SingleFlight`.
+
+The creation in `main31.py` is instant (the tasks are a `dict`), here it's replaced with one
+that takes `CREATE_DELAY` seconds, like a database write. For each number of concurrent
+requests for a new ID, counts how many times the creation ran and how long all the requests
+took, without coordination (each request checks and creates by itself) and through the
+`get_or_create` dependency of `main31.py` (with its `SingleFlight`).
+
+Run it from the root of the project with:
+
+    python -m benchmarks.bench_single_flight
+"""
+
+import asyncio
+import time
+from typing import Tuple
+from unittest import mock
+
+from fastapi import Response
+from fastapi.concurrency import run_in_threadpool
+
+import main31
+
+CONCURRENCY = [1, 10, 100]
+CREATE_DELAY = 0.1
+
+
+def run_benchmark(concurrency: int) -> Tuple[int, float, int, float]:
+    creations = 0
+
+    def slow_create_task(task_id: str) -> Tuple[str, bool]:
+        nonlocal creations
+        if task_id in main31.tasks:
+            return main31.tasks[task_id], False
+        creations += 1
+        time.sleep(CREATE_DELAY)
+        main31.tasks[task_id] = "This didn't exist before"
+        return main31.tasks[task_id], True
+
+    async def measure(request) -> Tuple[int, float]:
+        nonlocal creations
+        creations = 0
+        start = time.perf_counter()
+        await asyncio.gather(*(request() for _ in range(concurrency)))
+        return creations, time.perf_counter() - start
+
+    async def uncoordinated() -> None:
+        await run_in_threadpool(slow_create_task, "new")
+
+    async def coalesced() -> None:
+        await main31.get_or_create("new", Response())
+
+    async def main() -> Tuple[int, float, int, float]:
+        main31.tasks.pop("new", None)
+        plain = await measure(uncoordinated)
+        main31.tasks.pop("new", None)
+        with mock.patch.object(main31, "create_task", slow_create_task):
+            single_flight = await measure(coalesced)
+        main31.tasks.pop("new", None)
+        return (*plain, *single_flight)
+
+    return asyncio.run(main())
+
+
+def main():
+    print(
+        f"{'requests':>8} {'creations':>10} {'time (s)':>9} "
+        f"{'single-flight creations':>24} {'time (s)':>9}"
+    )
+    for concurrency in CONCURRENCY:
+        plain_creations, plain_time, creations, elapsed = run_benchmark(concurrency)
+        print(
+            f"{concurrency:>8} {plain_creations:>10} {plain_time:>9.2f} "
+            f"{creations:>24} {elapsed:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
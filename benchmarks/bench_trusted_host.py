@@ -0,0 +1,78 @@
+"""Host validation with 10k allowed domains: `TrustedHostMiddleware` vs the compiled one.
+
+Half of the allowed domains are exact hosts and half are wildcards. Each middleware wraps an
+app that does nothing, and is called directly over ASGI with a host that matches the last
+exact domain, one that matches the last wildcard (a few labels deep), and one that doesn't
+match anything.
+
+Run it from the root of the project with:
+
+    python -m benchmarks.bench_trusted_host
+"""
+
+import asyncio
+import time
+
+from fastapi.middleware.trustedhost import TrustedHostMiddleware
+
+from main41 import CompiledTrustedHostMiddleware, TrustedHosts
+
+DOMAINS = 10_000
+NUMBER = 2_000
+
+
+async def app(scope, receive, send):
+    pass
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def measure(middleware, host: str) -> float:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("bench", 80),
+        "path": "/",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", host.encode())],
+    }
+    started = time.perf_counter()
+    for _ in range(NUMBER):
+        await middleware(scope, receive, send)
+    return (time.perf_counter() - started) / NUMBER
+
+
+def main():
+    allowed_hosts = []
+    for i in range(DOMAINS // 2):
+        allowed_hosts.append(f"customer{i}.example")
+        allowed_hosts.append(f"*.tenant{i}.example.net")
+    started = time.perf_counter()
+    trusted_hosts = TrustedHosts(allowed_hosts)
+    compile_time = time.perf_counter() - started
+    middlewares = {
+        "TrustedHostMiddleware": TrustedHostMiddleware(app, allowed_hosts),
+        "compiled": CompiledTrustedHostMiddleware(app, trusted_hosts),
+    }
+    hosts = {
+        "exact": f"customer{DOMAINS // 2 - 1}.example",
+        "wildcard": f"api.eu.tenant{DOMAINS // 2 - 1}.example.net",
+        "no match": "attacker.example.org",
+    }
+    print(f"{DOMAINS} domains, compiled in {compile_time * 1e3:.1f} ms")
+    print(f"{'middleware':>22} " + " ".join(f"{name + ' (us)':>15}" for name in hosts))
+    for name, middleware in middlewares.items():
+        times = [asyncio.run(measure(middleware, host)) for host in hosts.values()]
+        print(f"{name:>22} " + " ".join(f"{t * 1e6:>15.2f}" for t in times))
+
+
+if __name__ == "__main__":
+    main()
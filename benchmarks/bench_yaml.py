@@ -0,0 +1,55 @@
+"""YAML ingestion: one document per request against a multi-document batch.
+
+The current path parses each item with the pure Python `yaml.safe_load()` and validates it
+with `Item.parse_obj()`. The batch path parses a multi-document stream with the LibYAML
+`CSafeLoader` (when available) and validates all the items at once with `ItemBatch`.
+
+Run it from the root of the project with:
+
+    python -m benchmarks.bench_yaml
+"""
+
+import timeit
+from typing import List
+
+import yaml
+
+from main7 import Item, ItemBatch
+from streaming_body import YAML_LOADER
+
+ITEM_COUNTS = [1, 100, 10_000]
+
+
+def make_documents(item_count: int) -> List[bytes]:
+    return [
+        f"name: Item {i}\ntags:\n  - tag{i}\n  - shared\n".encode()
+        for i in range(item_count)
+    ]
+
+
+def current_path(documents: List[bytes]) -> List[Item]:
+    return [Item.parse_obj(yaml.safe_load(document)) for document in documents]
+
+
+def batch_path(stream: bytes) -> List[Item]:
+    return ItemBatch.parse_obj(list(yaml.load_all(stream, Loader=YAML_LOADER))).__root__
+
+
+def main():
+    print(f"loader: {YAML_LOADER.__name__}")
+    print(f"{'items':>8} {'current (ms)':>14} {'batch (ms)':>12} {'speedup':>8}")
+    for item_count in ITEM_COUNTS:
+        documents = make_documents(item_count)
+        stream = b"---\n".join(documents)
+        assert current_path(documents) == batch_path(stream)
+        number = max(1, 1_000 // item_count)
+        current = timeit.timeit(lambda: current_path(documents), number=number)
+        batch = timeit.timeit(lambda: batch_path(stream), number=number)
+        print(
+            f"{item_count:>8} {current / number * 1e3:>14.3f} "
+            f"{batch / number * 1e3:>12.3f} {current / batch:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Latency of other requests during a storm of logins in `main33.py`.
+
+Sends waves of concurrent `POST /token` logins (each one a bcrypt verification) and, at the
+same time, a steady stream of authenticated `GET /users/me/` requests, all in-process over ASGI
+in the same event loop. It prints the p50/p99/max latency of `/users/me/`:
+
+- `idle`: without logins.
+- `storm, inline`: verifying the passwords directly in the `async` path operation.
+- `storm, process pool`: with the `BoundedProcessPool` (logins past its limit get a 503).
+
+Run it from the root of the project with:
+
+    python -m benchmarks.load_login_storm
+"""
+
+import asyncio
+import statistics
+import time
+from collections import Counter
+from typing import List
+
+import httpx
+
+import main33
+
+DURATION = 5.0
+LOGIN_CONCURRENCY = 16
+PROBE_INTERVAL = 0.01
+
+
+class InlinePool:
+    """
+    Runs the function directly, blocking the event loop, as before the process pool.
+    """
+
+    async def run(self, func, *args):
+        return func(*args)
+
+    def shutdown(self):
+        pass
+
+
+async def login(client: httpx.AsyncClient) -> int:
+    response = await client.post(
+        "/token",
+        data={"username": "johndoe", "password": "secret", "scope": "me"},
+    )
+    return response.status_code
+
+
+async def login_storm(client: httpx.AsyncClient, deadline: float) -> Counter:
+    statuses: Counter = Counter()
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            status_code = await login(client)
+            statuses[status_code] += 1
+            # Clients back off for a moment when they are told to
+            if status_code == 503:
+                await asyncio.sleep(0.05)
+
+    await asyncio.gather(*[worker() for _ in range(LOGIN_CONCURRENCY)])
+    return statuses
+
+
+async def probe(client: httpx.AsyncClient, token: str, deadline: float) -> List[float]:
+    """
+    Send a request every `PROBE_INTERVAL`, measure from when it should have been sent.
+
+    Measuring from when it was actually sent would hide the time the event loop was blocked.
+    """
+    latencies = []
+    headers = {"Authorization": f"Bearer {token}"}
+    scheduled = time.perf_counter()
+    while scheduled < deadline:
+        response = await client.get("/users/me/", headers=headers)
+        assert response.status_code == 200, response.text
+        latencies.append(time.perf_counter() - scheduled)
+        scheduled += PROBE_INTERVAL
+        await asyncio.sleep(max(0, scheduled - time.perf_counter()))
+    return latencies
+
+
+async def scenario(name: str, storm: bool) -> None:
+    async with httpx.AsyncClient(app=main33.app, base_url="http://bench") as client:
+        token = (
+            await client.post(
+                "/token",
+                data={"username": "johndoe", "password": "secret", "scope": "me"},
+            )
+        ).json()["access_token"]
+        # Warm up
+        await client.get("/users/me/", headers={"Authorization": f"Bearer {token}"})
+        deadline = time.perf_counter() + DURATION
+        tasks = [probe(client, token, deadline)]
+        if storm:
+            tasks.append(login_storm(client, deadline))
+        results = await asyncio.gather(*tasks)
+    latencies = sorted(results[0])
+    logins = dict(results[1]) if storm else {}
+    print(
+        f"{name:>20}  p50 {statistics.median(latencies) * 1e3:>8.2f} ms  "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:>8.2f} ms  "
+        f"max {latencies[-1] * 1e3:>8.2f} ms  logins {logins}"
+    )
+
+
+def main():
+    pool = main33.password_pool
+    asyncio.run(scenario("idle", storm=False))
+    main33.password_pool = InlinePool()
+    asyncio.run(scenario("storm, inline", storm=True))
+    main33.password_pool = pool
+    asyncio.run(scenario("storm, process pool", storm=True))
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
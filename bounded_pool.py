@@ -0,0 +1,66 @@
+"""A bounded process pool for CPU-bound work called from `async` path operations.
+
+CPU-bound work (like password hashing) called directly in an `async` path operation blocks the
+event loop, and every other request waits for it. Run in the threadpool, it would still compete
+for the GIL with the rest of the server. In a process pool, it runs in parallel, and the event
+loop only awaits the result.
+
+When the work arrives faster than the pool can do it, queueing it all only makes every caller
+wait longer (and time out anyway). `BoundedProcessPool` limits how many calls can be queued or
+running at once, and answers any call past that with a `503 Service Unavailable`, so clients
+can back off and retry later.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, status
+
+
+class BoundedProcessPool:
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        retry_after: int = 1,
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # By default, a few calls queued per worker, the rest are refused
+        self.max_pending = max_pending or 4 * self.max_workers
+        self.retry_after = retry_after
+        self.pending = 0
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def busy(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, try again later",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run `func(*args)` in a worker process, or raise a 503 if too many calls are pending.
+
+        `func` and its arguments have to be picklable (e.g. `func` a module level function).
+        """
+        if self.pending >= self.max_pending:
+            raise self.busy()
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        future = asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        self.pending += 1
+        future.add_done_callback(self._done)
+        # A cancelled request can't stop a call already sent to the pool, it's still counted
+        # (and run) until it finishes
+        return await asyncio.shield(future)
+
+    def _done(self, future: "asyncio.Future[Any]") -> None:
+        self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
@@ -0,0 +1,292 @@
+"""Content-negotiated image variants with an on-disk cache.
+
+Sending the original image to every client wastes bandwidth when the client only needs a small
+thumbnail, or could take a smaller format like WebP.
+
+`ImageVariants` picks the format from the `Accept` header (with its q-values and `image/*` or
+`*/*` wildcards) and the width from a query parameter (rounded up to a few fixed widths, so
+there's a bounded number of variants per image). When neither the format nor the size would
+change, the original is sent as it is. The variants are generated with Pillow in a process
+pool, so the resizing doesn't block the event loop (nor hold the GIL of the server process).
+
+Generated variants are stored in a content-addressed disk cache: the file name is a hash of
+the original image's content and the variant parameters. The cache has a maximum size, and the
+least recently used variants are deleted when it's exceeded. Variants already on disk are sent
+with `ZeroCopyFileResponse` (see `zerocopy_file.py`); if one is deleted by another request
+before it's sent, it's generated again.
+
+Pillow is optional: without it, the original image is always sent.
+"""
+
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from starlette.types import Receive, Scope, Send
+
+from prebuilt_response import parse_qvalues
+from zerocopy_file import ZeroCopyFileResponse
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: nocover
+    Image = None  # type: ignore
+
+# Preferred first, when the client lists several with the same quality
+FORMATS = {
+    "image/webp": ("WEBP", ".webp"),
+    "image/png": ("PNG", ".png"),
+    "image/jpeg": ("JPEG", ".jpg"),
+}
+WIDTHS = [64, 128, 256, 512, 1024, 2048]
+
+
+def file_digest(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, mode="rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def image_width(path: str) -> int:
+    # Only reads the header, not the whole image
+    with Image.open(path) as image:
+        return image.width
+
+
+def render_variant(
+    source_path: str, destination: str, image_format: str, width: Optional[int]
+) -> int:
+    """
+    Resize and re-encode an image, runs in a worker process.
+    """
+    with Image.open(source_path) as image:
+        if width is not None and width < image.width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        temporary = f"{destination}.{os.getpid()}.tmp"
+        image.save(temporary, format=image_format)
+    os.replace(temporary, destination)
+    return os.path.getsize(destination)
+
+
+def media_type_quality(qvalues: Dict[str, float], media_type: str) -> Tuple[float, int]:
+    """
+    The quality of `media_type` in an `Accept` header, and how specific the matching item is.
+    """
+    main_type = media_type.split("/")[0]
+    for specificity, item in ((2, media_type), (1, f"{main_type}/*"), (0, "*/*")):
+        if item in qvalues:
+            return qvalues[item], specificity
+    return 0.0, 0
+
+
+def choose_media_type(accept: str, original: str) -> str:
+    """
+    The best media type to send the image in, `original` if there's nothing better.
+    """
+    if not accept:
+        return original
+    qvalues = parse_qvalues(accept)
+    candidates: List[str] = list(FORMATS)
+    if original not in FORMATS:
+        candidates.append(original)
+    best, best_key = original, None
+    for index, media_type in enumerate(candidates):
+        quality, specificity = media_type_quality(qvalues, media_type)
+        if quality <= 0:
+            continue
+        # Among the formats only matched by a wildcard, the original one is kept
+        is_kept = specificity < 2 and media_type == original
+        key = (quality, specificity, is_kept, -index)
+        if best_key is None or key > best_key:
+            best, best_key = media_type, key
+    return best
+
+
+class ImageVariants:
+    def __init__(
+        self,
+        directory: str = ".image-cache",
+        max_bytes: int = 512 * 1024 * 1024,
+        max_workers: Optional[int] = None,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self.pool: Optional[ProcessPoolExecutor] = None
+        # Variant file name -> size, least recently used first
+        self.entries: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+        self.pending: Dict[str, "asyncio.Future[int]"] = {}
+        self.source_digests: Dict[Tuple[str, int, int], str] = {}
+        self.source_widths: Dict[Tuple[str, int, int], int] = {}
+        os.makedirs(directory, exist_ok=True)
+        self.load_entries()
+
+    def load_entries(self) -> None:
+        """
+        Pick up the variants left on disk by a previous run, oldest first.
+        """
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".tmp"):
+                continue
+            stat_result = os.stat(os.path.join(self.directory, name))
+            files.append((stat_result.st_mtime, name, stat_result.st_size))
+        for _, name, size in sorted(files):
+            self.entries[name] = size
+            self.total_bytes += size
+
+    @staticmethod
+    def source_key(path: str) -> Tuple[str, int, int]:
+        stat_result = os.stat(path)
+        return (path, stat_result.st_mtime_ns, stat_result.st_size)
+
+    async def source_digest(self, path: str) -> str:
+        key = self.source_key(path)
+        digest = self.source_digests.get(key)
+        if digest is None:
+            # Reads the whole image, not in the event loop
+            digest = await run_in_threadpool(file_digest, path)
+            self.source_digests[key] = digest
+        return digest
+
+    async def source_width(self, path: str) -> int:
+        key = self.source_key(path)
+        width = self.source_widths.get(key)
+        if width is None:
+            width = await run_in_threadpool(image_width, path)
+            self.source_widths[key] = width
+        return width
+
+    def evict(self, keep: str) -> None:
+        """
+        Delete the least recently used variants until the cache fits, except `keep`.
+        """
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            name = next(iter(self.entries))
+            if name == keep:
+                self.entries.move_to_end(name)
+                continue
+            size = self.entries.pop(name)
+            self.total_bytes -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    async def variant_path(
+        self, source_path: str, media_type: str, width: Optional[int]
+    ) -> str:
+        image_format, extension = FORMATS[media_type]
+        source_digest = await self.source_digest(source_path)
+        variant_key = f"{source_digest}-{image_format}-{width}"
+        name = hashlib.sha256(variant_key.encode()).hexdigest() + extension
+        path = os.path.join(self.directory, name)
+        if name in self.entries and os.path.exists(path):
+            self.entries.move_to_end(name)
+            return path
+        # Concurrent requests for the same variant wait for the same generation
+        future = self.pending.get(name)
+        if future is None:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                self.pool, render_variant, source_path, path, image_format, width
+            )
+            self.pending[name] = future
+            try:
+                size = await future
+            finally:
+                del self.pending[name]
+            # Generated again after its file was deleted, don't count it twice
+            self.total_bytes -= self.entries.pop(name, 0)
+            self.entries[name] = size
+            self.total_bytes += size
+            self.evict(keep=name)
+        else:
+            await future
+        return path
+
+    async def response(
+        self,
+        source_path: str,
+        media_type: str,
+        accept: Optional[str] = None,
+        width: Optional[int] = None,
+    ) -> ZeroCopyFileResponse:
+        """
+        The best variant of the image for this client, or the original one.
+        """
+        headers = {"Vary": "Accept"}
+        if Image is None:
+            return ZeroCopyFileResponse(
+                source_path, media_type=media_type, headers=headers
+            )
+        variant_media_type = choose_media_type(accept or "", media_type)
+        if width is not None:
+            width = next((bucket for bucket in WIDTHS if bucket >= width), WIDTHS[-1])
+            if width >= await self.source_width(source_path):
+                # Images are never enlarged
+                width = None
+        if variant_media_type not in FORMATS or (
+            variant_media_type == media_type and width is None
+        ):
+            return ZeroCopyFileResponse(
+                source_path, media_type=media_type, headers=headers
+            )
+        path = await self.variant_path(source_path, variant_media_type, width)
+        return VariantFileResponse(
+            self,
+            source_path,
+            width,
+            path,
+            media_type=variant_media_type,
+            headers=headers,
+        )
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+
+class VariantFileResponse(ZeroCopyFileResponse):
+    """
+    A variant file, generated again if it's deleted (evicted) before it's sent.
+    """
+
+    def __init__(
+        self,
+        variants: ImageVariants,
+        source_path: str,
+        width: Optional[int],
+        path: str,
+        **kwargs: Any,
+    ):
+        super().__init__(path, **kwargs)
+        self.variants = variants
+        self.source_path = source_path
+        self.width = width
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        except FileNotFoundError:
+            # Nothing was sent yet, the file is opened first
+            self.path = await self.variants.variant_path(
+                self.source_path, self.media_type, self.width
+            )
+            await super().__call__(scope, receive, send)
+
+
+image_variants = ImageVariants()
@@ -2,23 +2,71 @@
 
 Let's say that you want to return an XML response.
 You could put your XML content in a string, put it in a `Response`, and return it.
+
+But for big XML documents, building the whole document as a string first means holding all of
+it in memory. Instead, `XMLStreamingResponse` takes a generator (or async generator) of
+elements, and serializes them one by one, sending the output in fixed-size chunks.
+The elements are serialized with `ElementTree`, so their text and attributes are escaped
+correctly.
 """
 
-from fastapi import FastAPI, Response
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, Union
+from xml.etree import ElementTree
+from xml.sax.saxutils import quoteattr
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
 
 app = FastAPI()
 
 
+class XMLStreamingResponse(StreamingResponse):
+    media_type = "application/xml"
+
+    def __init__(
+        self,
+        root_tag: str,
+        elements: Union[
+            Iterable[ElementTree.Element], AsyncIterable[ElementTree.Element]
+        ],
+        root_attrib: Union[Dict[str, str], None] = None,
+        chunk_size: int = 64 * 1024,
+        **kwargs,
+    ):
+        self.root_tag = root_tag
+        self.root_attrib = root_attrib or {}
+        self.chunk_size = chunk_size
+        super().__init__(self.render_elements(elements), **kwargs)
+
+    async def render_elements(self, elements) -> AsyncIterator[bytes]:
+        if not isinstance(elements, AsyncIterable):
+            elements = iterate_in_threadpool(iter(elements))
+        attributes = "".join(
+            f" {name}={quoteattr(value)}" for name, value in self.root_attrib.items()
+        )
+        buffer = bytearray(
+            f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f"<{self.root_tag}{attributes}>".encode()
+        )
+        async for element in elements:
+            buffer += ElementTree.tostring(element, encoding="utf-8")
+            while len(buffer) >= self.chunk_size:
+                yield bytes(buffer[: self.chunk_size])
+                del buffer[: self.chunk_size]
+        buffer += f"</{self.root_tag}>".encode()
+        yield bytes(buffer)
+
+
+def shampoo_elements() -> Iterator[ElementTree.Element]:
+    header = ElementTree.Element("Header")
+    header.text = "Apply shampoo here."
+    yield header
+    body = ElementTree.Element("Body")
+    body.text = "You'll have to use soap here."
+    yield body
+
+
 @app.get("/legacy/")
 def get_legacy_data():
-    data = """<?xml version="1.0"?
-    <shampoo>
-    <Header>
-        Apply shampoo here.
-    </Header>
-    <Body>
-        You'll have to use soap here.
-    </Body>
-    </shampoo>
-    """
-    return Response(content=data, media_type="application/xml")
+    return XMLStreamingResponse("shampoo", shampoo_elements())
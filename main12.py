@@ -1,17 +1,21 @@
 """HTML response.
 
 To return a response with HTML directly from FastAPI, use `HTMLResponse`.
+
+As the HTML never changes, it's rendered once into a `PrebuiltResponse` (see
+`prebuilt_response.py`), with its `Content-Length`, `ETag` and compressed variants, and the same
+response is sent for every request.
 """
 
 from fastapi import FastAPI
 from fastapi.responses import HTMLResponse
 
-app = FastAPI()
+from prebuilt_response import PrebuiltResponse
 
+app = FastAPI()
 
-@app.get("/items/", response_class=HTMLResponse)
-async def read_items():
-    return """
+items_html = PrebuiltResponse(
+    """
     <html>
         <head>
             <title>Some HTML in here</title>
@@ -20,4 +24,11 @@ async def read_items():
             <h1>Look ma! HTML!</h1>
         </body>
     </html>
-    """
+    """,
+    media_type="text/html",
+)
+
+
+@app.get("/items/", response_class=HTMLResponse)
+async def read_items():
+    return items_html
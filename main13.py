@@ -2,17 +2,19 @@
 
 You can also override the response directly in your
 path operation, by returning it.
+
+Here the returned response is a `PrebuiltResponse` (see `prebuilt_response.py`): as the content
+is constant, it's encoded, compressed and given its headers only once, when the module is
+loaded.
 """
 
 from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
 
-app = FastAPI()
+from prebuilt_response import PrebuiltResponse
 
+app = FastAPI()
 
-@app.get("/items/")
-async def read_items():
-    html_content = """
+html_content = """
     <html>
         <head>
             <title>Some HTML in there</title>
@@ -22,4 +24,9 @@ async def read_items():
         </body>
     </html>
     """
-    return HTMLResponse(content=html_content, status_code=200)
+items_response = PrebuiltResponse(content=html_content, media_type="text/html")
+
+
+@app.get("/items/")
+async def read_items():
+    return items_response
@@ -6,14 +6,22 @@ the "media type" in OpenAPI, you can use the `response_class` parameter AND retu
 
 The `response_class` will then be used only to document the OpenAPI path operation, but your
 `Response` will be used as is.
+
+As the HTML is constant, `generate_html_response()` builds a `PrebuiltResponse` (see
+`prebuilt_response.py`) only the first time it's called, and then returns that same response.
 """
 
+from functools import lru_cache
+
 from fastapi import FastAPI
 from fastapi.responses import HTMLResponse
 
+from prebuilt_response import PrebuiltResponse
+
 app = FastAPI()
 
 
+@lru_cache()
 def generate_html_response():
     html_content = """
     <html>
@@ -25,7 +33,7 @@ def generate_html_response():
         </body>
     </html>
     """
-    return HTMLResponse(content=html_content, status_code=200)
+    return PrebuiltResponse(content=html_content, media_type="text/html")
 
 
 @app.get("/items/", response_class=HTMLResponse)
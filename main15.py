@@ -1,11 +1,19 @@
-"""`PlainTextResponse` takes some text or bytes and returns a plain text resposne."""
+"""`PlainTextResponse` takes some text or bytes and returns a plain text resposne.
+
+The text is always the same, so the response is prebuilt once with `PrebuiltResponse` (see
+`prebuilt_response.py`) and the path operation returns it directly.
+"""
 
 from fastapi import FastAPI
 from fastapi.responses import PlainTextResponse
 
+from prebuilt_response import PrebuiltResponse
+
 app = FastAPI()
 
+hello_world = PrebuiltResponse("Hello World", media_type="text/plain")
+
 
 @app.get("/", response_class=PlainTextResponse)
 async def main():
-    return "Hello World"
+    return hello_world
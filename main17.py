@@ -1,13 +1,198 @@
 """`RedirectResponse`.
 
 Returns an HTTP redirect. Uses a 307 status code (Temporary Redirect) by default.
+
+If you have lots of redirects (e.g. thousands of vanity or legacy URLs), declaring a path
+operation for each of them doesn't scale. Instead, `RedirectMiddleware` answers them from a
+`RedirectTable` loaded from a CSV or JSON file, before the request reaches the router:
+
+- Exact paths are looked up in a `dict`.
+- Sources ending with `*` are prefixes: the rest of the path is appended to the target, as it
+was sent (still percent-encoded). The longest matching prefix wins.
+
+The query string, if any, is appended to the target too.
+
+The responses (status code and headers) are built once, when the table is loaded. And the table
+can be reloaded at any time: the new table is built on the side and then swapped in with a
+single assignment, so requests in flight keep using the table they started with. Reloading it
+(`POST /admin/redirects/reload`) needs an admin API key in the `X-API-Key` header (see
+`api_keys.py`), one of those in the `ADMIN_API_KEYS` environment variable.
 """
 
-from fastapi import FastAPI
+import csv
+import json
+import os
+from typing import Dict, List, Tuple, Union
+from urllib.parse import quote, unquote
+
+from fastapi import Depends, FastAPI
 from fastapi.responses import RedirectResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from api_keys import APIKeys, RequireAPIKey
+
+REDIRECT_STATUS_CODES = {301, 302, 303, 307, 308}
+# Characters kept as they are in a `Location`, anything else (spaces, control characters,
+# non-ASCII) is percent-encoded. "%" is kept, so what is already encoded stays the same
+PATH_SAFE = "/:@!$&'()*+,;=%"
+QUERY_SAFE = PATH_SAFE + "?"
+TARGET_SAFE = QUERY_SAFE + "#[]"
+HEX_DIGITS = b"0123456789abcdefABCDEF"
+
+Redirect = Tuple[int, List[Tuple[bytes, bytes]]]
+
+
+def redirect_headers(location: str) -> List[Tuple[bytes, bytes]]:
+    return [(b"location", location.encode("ascii")), (b"content-length", b"0")]
+
+
+def raw_suffix(path: str, raw_path: bytes, length: int) -> str:
+    """
+    The part of `raw_path` after the first `length` characters of the (decoded) `path`.
+    """
+    # Each "%XX" in the raw path is one byte of the UTF-8 encoded path, anything else is itself
+    prefix_size = len(path[:length].encode("utf-8"))
+    position = decoded = 0
+    while decoded < prefix_size and position < len(raw_path):
+        escape = raw_path[position : position + 3]
+        if (
+            len(escape) == 3
+            and escape[0] == ord("%")
+            and escape[1] in HEX_DIGITS
+            and escape[2] in HEX_DIGITS
+        ):
+            position += 3
+        else:
+            position += 1
+        decoded += 1
+    if unquote(raw_path[:position].decode("latin-1")) != path[:length]:
+        # Not the same path (e.g. invalid UTF-8 in it), encode the decoded one again
+        return quote(path[length:], safe=PATH_SAFE.replace("%", ""))
+    return quote(raw_path[position:], safe=PATH_SAFE)
+
+
+def with_query(target: str, query_string: bytes) -> str:
+    if not query_string:
+        return target
+    query = quote(query_string, safe=QUERY_SAFE)
+    return f"{target}{'&' if '?' in target else '?'}{query}"
+
+
+class RedirectTable:
+    def __init__(self, rules: List[Tuple[str, str, int]]):
+        # Target and prebuilt redirect for each exact path
+        self.exact: Dict[str, Tuple[str, Redirect]] = {}
+        self.prefixes: Dict[str, Tuple[str, int]] = {}
+        for source, target, status_code in rules:
+            if status_code not in REDIRECT_STATUS_CODES:
+                raise ValueError(f"{status_code} is not a redirect status code")
+            target = quote(target, safe=TARGET_SAFE)
+            if source.endswith("*"):
+                self.prefixes[source[:-1]] = (target, status_code)
+            else:
+                self.exact[source] = (
+                    target,
+                    (status_code, redirect_headers(target)),
+                )
+        self.prefix_lengths = sorted(
+            {len(prefix) for prefix in self.prefixes}, reverse=True
+        )
+
+    @classmethod
+    def from_file(cls, path: str) -> "RedirectTable":
+        """
+        Load `source,target[,status_code]` rows from a CSV file, or a JSON list of
+        `{"source": ..., "target": ..., "status_code": ...}` objects.
+        """
+        rules = []
+        with open(path, newline="") as file:
+            if os.path.splitext(path)[1] == ".json":
+                for rule in json.load(file):
+                    status_code = int(rule.get("status_code", 301))
+                    rules.append((rule["source"], rule["target"], status_code))
+            else:
+                for row in csv.reader(file):
+                    if not row or row[0].startswith("#"):
+                        continue
+                    status_code = int(row[2]) if len(row) > 2 and row[2] else 301
+                    rules.append((row[0], row[1], status_code))
+        return cls(rules)
+
+    def lookup(
+        self, path: str, raw_path: Union[bytes, None] = None, query_string: bytes = b""
+    ) -> Union[Redirect, None]:
+        """
+        The redirect for a request, from its ASGI `path`, `raw_path` and `query_string`.
+        """
+        exact = self.exact.get(path)
+        if exact is not None:
+            target, redirect = exact
+            if not query_string:
+                return redirect
+            return redirect[0], redirect_headers(with_query(target, query_string))
+        for length in self.prefix_lengths:
+            if length <= len(path):
+                rule = self.prefixes.get(path[:length])
+                if rule is not None:
+                    target, status_code = rule
+                    if raw_path is None:
+                        raw_path = quote(path).encode("ascii")
+                    else:
+                        # Some servers (and test clients) include the query string in it
+                        raw_path = raw_path.split(b"?", 1)[0]
+                    target += raw_suffix(path, raw_path, length)
+                    return status_code, redirect_headers(
+                        with_query(target, query_string)
+                    )
+        return None
+
+
+class Redirects:
+    """
+    Holds the current `RedirectTable` for a file, and reloads it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.table = RedirectTable.from_file(path)
+
+    def reload(self) -> RedirectTable:
+        table = RedirectTable.from_file(self.path)
+        # Swapped in one step, requests never see a half loaded table
+        self.table = table
+        return table
+
+
+class RedirectMiddleware:
+    def __init__(self, app: ASGIApp, redirects: Redirects):
+        self.app = app
+        self.redirects = redirects
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+            redirect = self.redirects.table.lookup(
+                scope["path"], scope.get("raw_path"), scope.get("query_string", b"")
+            )
+            if redirect is not None:
+                status_code, headers = redirect
+                await send(
+                    {
+                        "type": "http.response.start",
+                        "status": status_code,
+                        "headers": headers,
+                    }
+                )
+                await send({"type": "http.response.body", "body": b""})
+                return
+        await self.app(scope, receive, send)
+
 
 app = FastAPI()
 
+redirects = Redirects("redirects.csv")
+require_admin = RequireAPIKey(APIKeys.from_env("ADMIN_API_KEYS"))
+app.add_middleware(RedirectMiddleware, redirects=redirects)
+
 
 # You can return a `RedirectResponse` directly:
 @app.get("/typer")
@@ -19,3 +204,9 @@ async def redirect_typer():
 @app.get("/fastapi", response_class=RedirectResponse)
 async def redirect_fastapi():
     return "https://fastapi.tiangolo.com"
+
+
+@app.post("/admin/redirects/reload", dependencies=[Depends(require_admin)])
+def reload_redirects():
+    table = redirects.reload()
+    return {"exact": len(table.exact), "prefixes": len(table.prefixes)}
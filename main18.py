@@ -1,19 +1,84 @@
 """`StreamingResponse`.
 
 Takes an async generator or a normal generator/iterator and streams the response body.
+
+Every value the generator yields is sent as a separate ASGI message (and usually a separate
+socket write), so a generator yielding tiny chunks pays that overhead for every few bytes.
+
+`CoalescingStreamingResponse` joins small chunks until it has `chunk_size` bytes (64 KiB by
+default) and sends them together. It only pulls the next chunk from the generator after the
+previous `send()` has finished, and the server doesn't finish a `send()` while the client isn't
+reading, so a slow client pauses the generator instead of making it buffer without limit.
+
+It also keeps some metrics about the stream: bytes sent, chunks sent and the time spent waiting
+for the client (stalled in `send()`).
 """
 
+import time
+from dataclasses import dataclass
+
 from fastapi import FastAPI
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.types import Send
 
 app = FastAPI()
 
 
+@dataclass
+class StreamMetrics:
+    bytes_sent: int = 0
+    chunks_sent: int = 0
+    stall_time: float = 0.0
+
+
+class CoalescingStreamingResponse(StreamingResponse):
+    def __init__(self, content, chunk_size: int = 64 * 1024, **kwargs):
+        super().__init__(content, **kwargs)
+        self.chunk_size = chunk_size
+        self.metrics = StreamMetrics()
+
+    async def send_body(self, send: Send, body: bytes, more_body: bool) -> None:
+        before = time.perf_counter()
+        await send({"type": "http.response.body", "body": body, "more_body": more_body})
+        self.metrics.stall_time += time.perf_counter() - before
+        self.metrics.bytes_sent += len(body)
+        self.metrics.chunks_sent += 1
+
+    async def stream_response(self, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        buffer = bytearray()
+        async for chunk in self.body_iterator:
+            if not isinstance(chunk, bytes):
+                chunk = chunk.encode(self.charset)
+            if not buffer and len(chunk) >= self.chunk_size:
+                # Already big enough, send it without copying it
+                await self.send_body(send, chunk, more_body=True)
+                continue
+            buffer += chunk
+            if len(buffer) >= self.chunk_size:
+                await self.send_body(send, bytes(buffer), more_body=True)
+                buffer.clear()
+        await self.send_body(send, bytes(buffer), more_body=False)
+
+
 async def fake_video_streamer():
     for i in range(10):
         yield b"some fake video bytes"
 
 
+def log_stream_metrics(metrics: StreamMetrics):
+    print(f"stream metrics: {metrics}")
+
+
 @app.get("/")
 async def main():
-    return StreamingResponse(fake_video_streamer())
+    response = CoalescingStreamingResponse(fake_video_streamer())
+    response.background = BackgroundTask(log_stream_metrics, response.metrics)
+    return response
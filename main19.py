@@ -7,19 +7,159 @@ That way, you don't have to read it all first in memory, and you can pass that g
 to the `StreamingResponse`, and return it.
 
 This includes many libraries to interact with cloud storage, video processing, and others.
+
+But iterating over a binary file with `yield from file_like` splits it at newline bytes, so the
+chunks can be tiny or as big as the whole file. Here the file is memory-mapped and sent in
+fixed-size chunks instead.
+
+Video players also need to seek, so the endpoint honours the `Range` header (and `If-Range`):
+it returns a `206 Partial Content` with just the requested bytes and their `Content-Range`, or
+a `multipart/byteranges` body when several ranges are requested.
 """
 
-from fastapi import FastAPI
+import hashlib
+import mmap
+import os
+import secrets
+from email.utils import formatdate
+from typing import Iterator, List, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.responses import StreamingResponse
 
 some_file_path = "large-video-file.mp4"
 app = FastAPI()
 
+CHUNK_SIZE = 256 * 1024
+# More ranges than this in one request are ignored, and the whole file is sent instead
+MAX_RANGES = 16
+
+
+def parse_range_header(header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parse a `Range: bytes=...` header into sorted, merged `(start, end)` pairs (`end`
+    excluded).
+
+    Returns `None` when the header should be ignored, and raises a 416 when none of the
+    ranges can be satisfied.
+    """
+    unit, _, specs = header.partition("=")
+    if unit.strip().lower() != "bytes" or not specs:
+        return None
+    ranges = []
+    for spec in specs.split(","):
+        first, dash, last = spec.strip().partition("-")
+        if not dash or not (first or last):
+            return None
+        if (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+        if not first:
+            # `bytes=-500` is the last 500 bytes
+            start, end = max(0, size - int(last)), size
+        elif last and int(last) < int(first):
+            return None
+        else:
+            start = int(first)
+            end = min(int(last) + 1, size) if last else size
+        if start < end:
+            ranges.append((start, end))
+    if not ranges:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    if len(ranges) > MAX_RANGES:
+        return None
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def iter_mapped(
+    path: str, ranges: List[Tuple[int, int]], parts: Optional[List[bytes]] = None
+) -> Iterator[bytes]:
+    """
+    Yield the bytes of each range of the file, in chunks of at most `CHUNK_SIZE`.
+
+    With `parts`, each range is preceded by its part header, and the closing delimiter is
+    sent at the end.
+    """
+    with open(path, mode="rb") as file_like:
+        size = os.fstat(file_like.fileno()).st_size
+        mapped = (
+            mmap.mmap(file_like.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        )
+        try:
+            for index, (start, end) in enumerate(ranges):
+                if parts is not None:
+                    yield parts[index]
+                for offset in range(start, end, CHUNK_SIZE):
+                    yield mapped[offset : min(offset + CHUNK_SIZE, end)]
+            if parts is not None:
+                yield parts[-1]
+        finally:
+            if mapped is not None:
+                mapped.close()
+
 
 @app.get("/")
-def main():
-    def iterfile():
-        with open(some_file_path, mode="rb") as file_like:
-            yield from file_like
+def main(request: Request):
+    stat_result = os.stat(some_file_path)
+    size = stat_result.st_size
+    etag_base = f"{stat_result.st_mtime}-{size}"
+    etag = f'"{hashlib.md5(etag_base.encode()).hexdigest()}"'
+    last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+    headers = {"Accept-Ranges": "bytes", "ETag": etag, "Last-Modified": last_modified}
+    media_type = "video/mp4"
+
+    ranges = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range in (etag, last_modified)):
+        ranges = parse_range_header(range_header, size)
+
+    if ranges is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(
+            iter_mapped(some_file_path, [(0, size)]),
+            media_type=media_type,
+            headers=headers,
+        )
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+        headers["Content-Length"] = str(end - start)
+        return StreamingResponse(
+            iter_mapped(some_file_path, ranges),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=media_type,
+            headers=headers,
+        )
 
-    return StreamingResponse(iterfile(), media_type="video/mp4")
+    boundary = secrets.token_hex(16)
+    parts: List[bytes] = []
+    for start, end in ranges:
+        delimiter = f"\r\n--{boundary}\r\n" if parts else f"--{boundary}\r\n"
+        part_headers = (
+            f"Content-Type: {media_type}\r\n"
+            f"Content-Range: bytes {start}-{end - 1}/{size}\r\n\r\n"
+        )
+        parts.append((delimiter + part_headers).encode())
+    parts.append(f"\r\n--{boundary}--\r\n".encode())
+    content_length = sum(len(part) for part in parts) + sum(
+        end - start for start, end in ranges
+    )
+    headers["Content-Length"] = str(content_length)
+    return StreamingResponse(
+        iter_mapped(some_file_path, ranges, parts),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=f"multipart/byteranges; boundary={boundary}",
+        headers=headers,
+    )
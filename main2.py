@@ -2,11 +2,18 @@
 If you want to use your API's function names as operationIds,
 you can iterate over all of them and override eah path's
 operation's operation_id using their APIRoute.name
+
+Because the operation IDs are only rewritten after all the routes are registered, the
+OpenAPI schema can only be built after that too. Here we build it once into a prebuilt
+artifact (see `openapi_cache.py`), so workers serve `/openapi.json` from bytes on disk
+instead of generating it on their first request.
 """
 
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
 
+from openapi_cache import install_openapi_artifact
+
 app = FastAPI()
 
 
@@ -28,3 +35,4 @@ def use_route_names_as_operation_ids(app: FastAPI) -> None:
 
 
 use_route_names_as_operation_ids(app)
+install_openapi_artifact(app)
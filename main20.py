@@ -11,11 +11,18 @@ infer a media type.
 - filename: If set, this will be included in the response Content-Disposition.
 
 File responses will include appropriate Content-Length, Last-Modified and ETag headers.
+
+For files that are served again and again (videos, assets), `ZeroCopyFileResponse` (see
+`zerocopy_file.py`) takes the same `path`, `headers`, `media_type` and `filename` arguments,
+but keeps the open file and its headers cached between requests, and lets the server send the
+file with `os.sendfile()` when it supports the ASGI zero-copy send extension.
 """
 
 from fastapi import FastAPI
 from fastapi.responses import FileResponse
 
+from zerocopy_file import ZeroCopyFileResponse
+
 some_file_path = "large-video-file.mp4"
 app = FastAPI()
 
@@ -25,6 +32,11 @@ async def main():
     return FileResponse(some_file_path)
 
 
+@app.get("/cached")
+async def main_cached():
+    return ZeroCopyFileResponse(some_file_path)
+
+
 # You can also use the `response_class` parameter:
 # @app.get("/", response_class=FileResponse)
 # async def main():
@@ -5,14 +5,19 @@ response.
 
 For example, you can add an additional media type of `image/png`, declaring that your path
 opeartion can return a JSON object (with media type `application/json`) or a PNG image.
+
+The image is negotiated with the client: with an `Accept` header that prefers another format
+(e.g. `image/webp`) or a `width` query parameter, a resized and re-encoded variant is sent
+instead of the original (see `image_variants.py`).
 """
 
 from typing import Union
 
-from fastapi import FastAPI
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, Header, Query
 from pydantic import BaseModel
 
+from image_variants import image_variants
+
 
 class Item(BaseModel):
     id: str
@@ -22,6 +27,11 @@ class Item(BaseModel):
 app = FastAPI()
 
 
+@app.on_event("shutdown")
+def shutdown_image_variants():
+    image_variants.close()
+
+
 @app.get(
     "/items/{item_id}",
     response_model=Item,
@@ -32,8 +42,15 @@ app = FastAPI()
         }
     },
 )
-async def read_item(item_id: str, img: Union[bool, None] = None):
+async def read_item(
+    item_id: str,
+    img: Union[bool, None] = None,
+    width: Union[int, None] = Query(default=None, gt=0),
+    accept: Union[str, None] = Header(default=None),
+):
     if img:
-        return FileResponse("image.png", media_type="image/png")
+        return await image_variants.response(
+            "image.png", media_type="image/png", accept=accept, width=width
+        )
     else:
         return {"id": "foo", "value": "there goes my hero"}
@@ -5,14 +5,18 @@ you want to combine them with custom responses needed by each path opeartion.
 
 For those cases, you can use the Python technique of "unpacking" a `dict` with
 `**dict_to_unpack`.
+
+As in `main24.py`, the image is sent in the best format and size for the client (see
+`image_variants.py`).
 """
 
 from typing import Union
 
-from fastapi import FastAPI
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, Header, Query
 from pydantic import BaseModel
 
+from image_variants import image_variants
+
 
 class Item(BaseModel):
     id: str
@@ -29,13 +33,25 @@ responses = {
 app = FastAPI()
 
 
+@app.on_event("shutdown")
+def shutdown_image_variants():
+    image_variants.close()
+
+
 @app.get(
     "/items/{item_id}",
     response_model=Item,
     responses={**responses, 200: {"content": {"image/png": {}}}},
 )
-async def read_item(item_id: str, img: Union[bool, None] = None):
+async def read_item(
+    item_id: str,
+    img: Union[bool, None] = None,
+    width: Union[int, None] = Query(default=None, gt=0),
+    accept: Union[str, None] = Header(default=None),
+):
     if img:
-        return FileResponse("image.png", media_type="image/png")
+        return await image_variants.response(
+            "image.png", media_type="image/png", accept=accept, width=width
+        )
     else:
         return {"id": "foo", "value": "there goes my hero"}
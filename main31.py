@@ -19,18 +19,56 @@ and will put them in the final response that contains the value you returned, fi
 
 You can also declare the `Response` parameter in dependencies, and set the status_code in
 them. But have in mind that the last one to be set will win.
+
+Checking if the task exists and then creating it is a race when several requests for the same
+ID arrive at the same time. The creation goes through a `SingleFlight` (see `single_flight.py`),
+so concurrent requests for the same ID wait for one creation and all get its result: only the
+one that created it gets a 201, the rest get a 200. The `get_or_create` dependency is `async`,
+the `-sync` path operation shows the same in a normal `def` function, in the threadpool.
 """
 
-from fastapi import FastAPI, Response, status
+from typing import Tuple
+
+from fastapi import Depends, FastAPI, Response, status
+
+from single_flight import SingleFlight
 
 app = FastAPI()
 
 tasks = {"foo": "Listen to the Bar Fighters"}
+task_creations = SingleFlight()
+
+
+@app.on_event("shutdown")
+def shutdown_task_creations():
+    task_creations.shutdown()
+
+
+def create_task(task_id: str) -> Tuple[str, bool]:
+    """
+    Get the task, or create it (like a database write), return it and if it was created.
+    """
+    if task_id in tasks:
+        return tasks[task_id], False
+    tasks[task_id] = "This didn't exist before"
+    return tasks[task_id], True
+
+
+async def get_or_create(task_id: str, response: Response) -> str:
+    (task, created), shared = await task_creations.run(task_id, create_task, task_id)
+    if created and not shared:
+        response.status_code = status.HTTP_201_CREATED
+    return task
 
 
 @app.put("/get-or-create-task/{task_id}", status_code=200)
-def get_or_create_task(task_id: str, response: Response):
-    if task_id not in tasks:
-        tasks[task_id] = "This didn't exist before"
+def get_or_create_task(task: str = Depends(get_or_create)):
+    return task
+
+
+@app.put("/get-or-create-task-sync/{task_id}", status_code=200)
+def get_or_create_task_sync(task_id: str, response: Response):
+    (task, created), shared = task_creations.run_sync(task_id, create_task, task_id)
+    if created and not shared:
         response.status_code = status.HTTP_201_CREATED
-    return tasks[task_id]
+    return task
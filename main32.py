@@ -1,9 +1,28 @@
-"""Advanced dependencies."""
+"""Advanced dependencies.
+
+`FixedContentQueryChecker` checks for a single fixed string. To check a query against a whole
+blocklist, one checker per string means going through the query once per pattern.
+
+`MultiPatternQueryChecker` compiles all the patterns once into an Aho-Corasick automaton, and
+then finds all the patterns in the query in a single pass over it, however many patterns there
+are. The pattern set can be replaced at runtime: the new automaton is built first and then
+swapped in, so requests being checked keep using the old one.
+
+Replacing the pattern set (`PUT /blocklist/`) needs an admin API key in the `X-API-Key` header
+(see `api_keys.py`), one of those in the `ADMIN_API_KEYS` environment variable.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List
 
 from fastapi import Depends, FastAPI
 
+from api_keys import APIKeys, RequireAPIKey
+
 app = FastAPI()
 
+require_admin = RequireAPIKey(APIKeys.from_env("ADMIN_API_KEYS"))
+
 
 class FixedContentQueryChecker:
     def __init__(self, fixed_content: str):
@@ -15,9 +34,100 @@ class FixedContentQueryChecker:
         return False
 
 
+class AhoCorasick:
+    """
+    Aho-Corasick automaton: finds all the patterns that occur in a text, in one pass.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        # Empty patterns would match everything, duplicates would be reported twice
+        self.patterns = list(dict.fromkeys(pattern for pattern in patterns if pattern))
+        # The trie: transitions per node, and the pattern ending at each node (or -1)
+        self.goto: List[Dict[str, int]] = [{}]
+        self.output: List[int] = [-1]
+        for index, pattern in enumerate(self.patterns):
+            node = 0
+            for char in pattern:
+                next_node = self.goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][char] = next_node
+                    self.goto.append({})
+                    self.output.append(-1)
+                node = next_node
+            self.output[node] = index
+        # For each node, the longest proper suffix that is also in the trie (`fail`), and the
+        # next node on that chain where a pattern ends (`report`, -1 if none)
+        self.fail = [0] * len(self.goto)
+        self.report = [-1] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                fail = self.goto[state].get(char, 0)
+                self.fail[child] = fail
+                self.report[child] = (
+                    fail if self.output[fail] >= 0 else self.report[fail]
+                )
+
+    def search(self, text: str) -> List[str]:
+        """
+        The patterns found in `text`, in the order they were given.
+        """
+        goto, fail, output, report = self.goto, self.fail, self.output, self.report
+        found = set()
+        node = 0
+        for char in text:
+            next_node = goto[node].get(char)
+            while next_node is None and node:
+                node = fail[node]
+                next_node = goto[node].get(char)
+            node = next_node or 0
+            match = node if output[node] >= 0 else report[node]
+            while match > 0:
+                found.add(output[match])
+                match = report[match]
+        return [self.patterns[index] for index in sorted(found)]
+
+
+class MultiPatternQueryChecker:
+    def __init__(self, patterns: Iterable[str]):
+        self.set_patterns(patterns)
+
+    def set_patterns(self, patterns: Iterable[str]) -> None:
+        # Build the whole automaton before replacing the old one
+        self.automaton = AhoCorasick(patterns)
+
+    @property
+    def patterns(self) -> List[str]:
+        return self.automaton.patterns
+
+    def __call__(self, q: str = "") -> List[str]:
+        if q:
+            return self.automaton.search(q)
+        return []
+
+
 checker = FixedContentQueryChecker("bar")
+blocklist_checker = MultiPatternQueryChecker(["bar", "baz", "foobar"])
 
 
 @app.get("/query-checker/")
 async def read_query_checker(fixed_content_included: bool = Depends(checker)):
     return {"fixed_content_in_query": fixed_content_included}
+
+
+@app.get("/blocklist-checker/")
+async def read_blocklist_checker(matched: List[str] = Depends(blocklist_checker)):
+    return {"blocked": bool(matched), "matched_patterns": matched}
+
+
+@app.put("/blocklist/", dependencies=[Depends(require_admin)])
+def replace_blocklist(patterns: List[str]):
+    # A normal `def`, compiling a big pattern set is CPU work, it's run in the threadpool
+    blocklist_checker.set_patterns(patterns)
+    return {"patterns": len(blocklist_checker.patterns)}
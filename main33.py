@@ -68,12 +68,34 @@ the dependants for that specific path operation and that specific dependency tre
 Because the `SecurityScopes` will have all the scopes declared by dependants, you can use it
 to verify that a token has the required scopes in a central dependency function, and then
 declare different scope requirements in different path operations.
+
+Hashing and verifying passwords with bcrypt is slow on purpose (hundreds of milliseconds of
+CPU). Done directly in the `async` path operation, it would block the event loop, and every
+other request would wait during a burst of logins. Here it's run in a `BoundedProcessPool` (see
+`bounded_pool.py`) and awaited; when too many logins are already waiting for the pool, the next
+ones get a `503 Service Unavailable` with a `Retry-After` header. The same for hashing the new
+password in `PUT /users/me/password`.
+
+Clients send the same token with every request. `get_current_user` keeps the verified claims
+and the user for each token in a `VerifiedTokenCache` (see `token_cache.py`) until the token
+expires, so it only decodes and verifies each token once. The scopes are still checked on every
+request, as they depend on the path operation. When a user is disabled, `disable_user()` drops
+their cached tokens.
+
+Each token has a unique ID (the `jti` claim), and `POST /logout/` revokes the token it's called
+with, before it expires. Every request checks the token ID against a `RevocationList` (see
+`token_revocation.py`): an in-memory Bloom filter answers for almost all of them without any
+I/O, only the possibly revoked ones are checked in the SQLite store (in a worker thread). Each
+worker process rebuilds its filter from the store every few seconds, so a token revoked by one
+worker is rejected by the others after at most `2 * purge_interval` seconds.
 """
 
 from datetime import datetime, timedelta
 from typing import List, Union
+from uuid import uuid4
 
 from fastapi import Depends, FastAPI, HTTPException, Security, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import (
     OAuth2PasswordBearer,
     OAuth2PasswordRequestForm,
@@ -83,6 +105,10 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel, ValidationError
 
+from bounded_pool import BoundedProcessPool
+from token_cache import VerifiedTokenCache
+from token_revocation import RevocationList
+
 # to get a string like this run:
 # openssl rand -hex 32
 SECRET_KEY = "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7"
@@ -115,6 +141,7 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     username: Union[str, None] = None
     scopes: List[str] = []
+    jti: Union[str, None] = None
 
 
 class User(BaseModel):
@@ -128,6 +155,11 @@ class UserInDB(User):
     hashed_password: str
 
 
+class PasswordChange(BaseModel):
+    current_password: str
+    new_password: str
+
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 oauth2_scheme = OAuth2PasswordBearer(
@@ -135,9 +167,21 @@ oauth2_scheme = OAuth2PasswordBearer(
     scopes={"me": "Read information about the current user.", "item": "Read items."},
 )
 
+# bcrypt takes hundreds of milliseconds of CPU, it's run in worker processes
+password_pool = BoundedProcessPool()
+# Verified tokens, with their claims and users
+token_cache = VerifiedTokenCache()
+# IDs of the tokens revoked before they expire
+revocations = RevocationList()
+
 app = FastAPI()
 
 
+@app.on_event("shutdown")
+def shutdown_password_pool():
+    password_pool.shutdown()
+
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -146,28 +190,39 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+async def hash_password(password):
+    return await password_pool.run(get_password_hash, password)
+
+
 def get_user(db, username: str):
     if username in db:
         user_dict = db[username]
         return UserInDB(**user_dict)
 
 
-def authenticate_user(fake_db, username: str, password: str):
+async def authenticate_user(fake_db, username: str, password: str):
     user = get_user(fake_db, username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await password_pool.run(verify_password, password, user.hashed_password):
         return False
     return user
 
 
+def disable_user(db, username: str):
+    db[username]["disabled"] = True
+    # The cached users would still be the enabled ones
+    token_cache.invalidate_user(username)
+
+
 def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None):
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    # A unique ID, to be able to revoke this token
+    to_encode.update({"exp": expire, "jti": uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -185,17 +240,28 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": authenticate_value},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    cached = token_cache.get(token)
+    if cached is not None:
+        token_data, user = cached
+    else:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            username: str = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+            jti: str = payload.get("jti")
+            if jti is None:
+                raise credentials_exception
+            token_scopes = payload.get("scopes", [])
+            token_data = TokenData(scopes=token_scopes, username=username, jti=jti)
+        except (JWTError, ValidationError):
             raise credentials_exception
-        token_scopes = payload.get("scopes", [])
-        token_data = TokenData(scopes=token_scopes, username=username)
-    except (JWTError, ValidationError):
-        raise credentials_exception
-    user = get_user(fake_users_db, username=token_data.username)
-    if user is None:
+        user = get_user(fake_users_db, username=token_data.username)
+        if user is None:
+            raise credentials_exception
+        token_cache.set(token, user.username, (token_data, user), payload.get("exp"))
+    # Also for cached tokens, they could have been revoked since
+    if await revocations.is_revoked(token_data.jti):
         raise credentials_exception
     for scope in security_scopes.scopes:
         if scope not in token_data.scopes:
@@ -217,7 +283,9 @@ async def get_current_active_user(
 
 @app.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(fake_users_db, form_data.username, form_data.password)
+    user = await authenticate_user(
+        fake_users_db, form_data.username, form_data.password
+    )
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -225,7 +293,18 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
         data={"sub": user.username, "scopes": form_data.scopes},
         expires_delta=access_token_expires,
     )
-    return {"access_token": access_token, "tokey_type": "bearer"}
+    return {"access_token": access_token, "token_type": "bearer"}
+
+
+@app.post("/logout/")
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_user),
+):
+    # The token was already verified by `get_current_user`
+    claims = jwt.get_unverified_claims(token)
+    await run_in_threadpool(revocations.revoke, claims["jti"], claims["exp"])
+    return {"status": "logged out"}
 
 
 @app.get("/users/me/", response_model=User)
@@ -233,6 +312,23 @@ async def read_users_me(current_user: User = Depends(get_current_active_user)):
     return current_user
 
 
+@app.put("/users/me/password")
+async def change_password(
+    password_change: PasswordChange,
+    current_user: User = Depends(get_current_active_user),
+):
+    user = await authenticate_user(
+        fake_users_db, current_user.username, password_change.current_password
+    )
+    if not user:
+        raise HTTPException(status_code=400, detail="Incorrect password")
+    hashed_password = await hash_password(password_change.new_password)
+    fake_users_db[user.username]["hashed_password"] = hashed_password
+    # The cached users still have the old hash
+    token_cache.invalidate_user(user.username)
+    return {"status": "password changed"}
+
+
 @app.get("/users/me/items/")
 async def read_own_items(
     current_user: User = Security(get_current_active_user, scopes=["items"])
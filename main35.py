@@ -4,17 +4,58 @@ Use a dependency to check if the username and password are correct.
 For this, use the Python standard module `secrets`.
 `secrets.compare_digest()` needs to take `bytes` or a `str` that only contains ASCII characters.
 To handle that, we first convert the `username` and `password` to `bytes` encoding them with
-UTF-8."""
+UTF-8.
 
+Passwords should be stored as salted hashes, and checking one is slow on purpose. With HTTP
+Basic the password comes with every request, so `/users/hashed/me` uses a `BasicAuthVerifier`
+(see `basic_auth.py`): it caches the verified credentials (as an HMAC) for a short time, so only
+the first request pays for the hash, and it locks out users and IPs with too many failures.
+"""
+
+import hashlib
 import secrets
+from typing import Optional
 
 from fastapi import Depends, FastAPI, HTTPException, status
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 
+from basic_auth import BasicAuthVerifier
+
 app = FastAPI()
 
 security = HTTPBasic()
 
+# "swordfish", hashed with `hash_password()`
+fake_password_hashes = {
+    "stanleyjobson": "pbkdf2_sha256$600000$4595039f93349408e36916bf26edea12$"
+    "ce0140a842409a18bdac83a026ad986cb7355ea736fe62af39a0f0dfad9771aa"
+}
+DUMMY_HASH = (
+    "pbkdf2_sha256$600000$02c7d58b8228648a8b5a841730816c19$"
+    "2a41eded8eeb783332dcbb1560d4ee006245ce2afe539ac248966b55a8f15057"
+)
+
+
+def hash_password(password: str, iterations: int = 600_000) -> str:
+    salt = secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf8"), salt, iterations)
+    return f"pbkdf2_sha256${iterations}${salt.hex()}${digest.hex()}"
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    _, iterations, salt, expected = password_hash.split("$")
+    digest = hashlib.pbkdf2_hmac(
+        "sha256", password.encode("utf8"), bytes.fromhex(salt), int(iterations)
+    )
+    return secrets.compare_digest(digest, bytes.fromhex(expected))
+
+
+def get_password_hash(username: str) -> Optional[str]:
+    return fake_password_hashes.get(username)
+
+
+verify_credentials = BasicAuthVerifier(get_password_hash, verify_password, DUMMY_HASH)
+
 
 def get_current_username(credentials: HTTPBasicCredentials = Depends(security)):
     current_username_bytes = credentials.username.encode("utf8")
@@ -39,3 +80,8 @@ def get_current_username(credentials: HTTPBasicCredentials = Depends(security)):
 @app.get("/users/me")
 def read_current_user(username: str = Depends(get_current_username)):
     return {"username": username}
+
+
+@app.get("/users/hashed/me")
+def read_current_user_hashed(username: str = Depends(verify_credentials)):
+    return {"username": username}
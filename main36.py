@@ -10,14 +10,36 @@ And by doing so, FastAPI is validating that data, converting it and generating d
 for your API automatically.
 
 But there are situations where you might need to access the `Request` object directly.
+
+For example, the client's IP in `request.client.host` is what `RateLimit` (see `rate_limit.py`)
+uses by default to limit the requests of each client: `/items/{item_id}` allows each IP 10
+requests per second on average, in bursts of up to 20. `/search/` allows 100 requests per
+minute for each API key (the `X-API-Key` header), with a sliding window. Only the keys in the
+`SEARCH_API_KEYS` environment variable count (see `api_keys.py`), requests without one of them
+share the limit of their client IP.
 """
 
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
+
+from api_keys import APIKeys
+from rate_limit import RateLimit, SlidingWindowLimiter, TokenBucketLimiter, api_key
 
 app = FastAPI()
 
+search_api_keys = APIKeys.from_env("SEARCH_API_KEYS")
+
+per_ip_limit = RateLimit(TokenBucketLimiter(rate=10, burst=20))
+per_api_key_limit = RateLimit(
+    SlidingWindowLimiter(limit=100, window=60), key=api_key(search_api_keys.is_valid)
+)
 
-@app.get("/items/{item_id}")
+
+@app.get("/items/{item_id}", dependencies=[Depends(per_ip_limit)])
 def read_root(item_id: str, request: Request):
     client_host = request.client.host
     return {"client_host": client_host, "item_id": item_id}
+
+
+@app.get("/search/", dependencies=[Depends(per_api_key_limit)])
+def search(q: str = ""):
+    return {"q": q, "results": []}
@@ -1,10 +1,17 @@
-"""Dataclasses in `response_model`"""
+"""Dataclasses in `response_model`
+
+`read_next_item` returns a `Versioned` value (see `response_cache.py`): as long as
+`next_item_version` doesn't change, the response validated against `Item` and serialized the
+first time is sent again, and `load_next_item()` isn't even called.
+"""
 
 from dataclasses import dataclass, field
 from typing import List, Union
 
 from fastapi import FastAPI
 
+from response_cache import CachedResponseRoute, ResponseCache, Versioned
+
 
 @dataclass
 class Item:
@@ -16,13 +23,23 @@ class Item:
 
 
 app = FastAPI()
+app.router.route_class = CachedResponseRoute
 
+next_item_cache = ResponseCache(maxsize=4)
+# Change it when the next item changes
+next_item_version = 1
 
-@app.get("/items/next", response_model=Item)
-async def read_next_item():
+
+def load_next_item():
     return {
         "name": "Island In The Moon",
         "price": 12.99,
         "description": "A place to be playin' and havin' fun",
         "tags": ["breater"],
     }
+
+
+@app.get("/items/next", response_model=Item)
+@next_item_cache
+async def read_next_item():
+    return Versioned(next_item_version, load_next_item)
@@ -6,11 +6,18 @@ and their own docs UIs, you can have a main app and "mount" one (or more) sub-ap
 "Mounting" means adding a completely "independent" application in a specific path, that then
 takes care of handling everything under that path, with the path operations declared in that sub-
 application.
+
+The mounted `subapi` sits behind the main app's routes. Here the main app resolves its routes
+with the compiled radix tree from `radix_router.py`, so a request for `/subapi/sub` doesn't have
+to be checked against every route of the main app before reaching the mount.
 """
 
 from fastapi import FastAPI
 
+from radix_router import use_radix_router
+
 app = FastAPI()
+use_radix_router(app)
 
 
 @app.get("/app")
@@ -11,27 +11,31 @@ request in the OpenAPI schema.
 
 You could do that with `openapi_extra`.
 
-In this example, we didn't declare any Pydantic model. In fact, the request body is not even
-parsed as JSON, it is read directly as bytes, and the function `magic_data_reader()` would be
-in charge of parsing it in some way.
+In this example, we didn't declare any Pydantic model. The request body is not parsed by
+FastAPI: the path operation reads it from the request itself, with `StreamingBody` (see
+`streaming_body.py`), and passes the parsed value to `magic_data_reader()`, which would be in
+charge of validating it in some way.
 
 Nevertheless, we can declare the expected schema for the request body.
+
+Instead of `await request.body()`, which buffers the whole payload before parsing starts,
+`StreamingBody` feeds the chunks to an incremental JSON parser as they arrive, and enforces the
+size limit while reading. The body is an object, and each of its members is parsed as soon as
+it's complete, so apart from the parsed data, only the member being parsed is kept in memory
+(not the whole payload).
 """
 
+from typing import Any
+
 from fastapi import FastAPI, Request
 
+from streaming_body import StreamingBody
+
 app = FastAPI()
 
 
-def magic_data_reader(raw_body: bytes):
-    return {
-        "size": len(raw_body),
-        "content": {
-            "name": "Maagic",
-            "price": 42,
-            "description": "Just kiddin', no magic here. ✨",
-        },
-    }
+def magic_data_reader(data: Any, size: int):
+    return {"size": size, "content": data}
 
 
 @app.post(
@@ -56,6 +60,7 @@ def magic_data_reader(raw_body: bytes):
     },
 )
 async def create_item(request: Request):
-    raw_body = await request.body()
-    data = magic_data_reader(raw_body)
+    body = StreamingBody(request)
+    content = await body.load_json()
+    data = magic_data_reader(content, body.size)
     return data
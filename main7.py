@@ -18,14 +18,23 @@ won't even try to parse the request payload as JSON.
 
 And then in our code, we parse that YAML content directly, adn then we are again using the
 same Pydantic model to validate the YAML content.
+
+The body is not read with `await request.body()`: the YAML parser reads it chunk by chunk
+from `request.stream()` through `StreamingBody` (see `streaming_body.py`), so a too large
+payload is rejected while it's being read.
+
+To ingest many items at once, `/items/batch/` accepts a multi-document YAML stream (documents
+separated by `---`), one item per document. All the documents are validated in a single pass
+with the `ItemBatch` model, declared once, instead of one `Item.parse_obj()` per document.
 """
 
 from typing import List
 
-import yaml
 from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel, ValidationError
 
+from streaming_body import StreamingBody
+
 app = FastAPI()
 
 
@@ -34,6 +43,10 @@ class Item(BaseModel):
     tags: List[str]
 
 
+class ItemBatch(BaseModel):
+    __root__: List[Item]
+
+
 @app.post(
     "/items/",
     openapi_extra={
@@ -44,13 +57,27 @@ class Item(BaseModel):
     },
 )
 async def create_item(request: Request):
-    raw_body = await request.body()
-    try:
-        data = yaml.safe_load(raw_body)
-    except yaml.YAMLError:
-        raise HTTPException(status_code=422, detail="Invalid YAML")
+    data = await StreamingBody(request).load_yaml()
     try:
         item = Item.parse_obj(data)
     except ValidationError as e:
         raise HTTPException(status_code=422, detail=e.errors())
     return item
+
+
+@app.post(
+    "/items/batch/",
+    openapi_extra={
+        "requestBody": {
+            "content": {"application/x-yaml": {"schema": Item.schema()}},
+            "required": True,
+        },
+    },
+)
+async def create_items(request: Request):
+    documents = await StreamingBody(request).load_yaml_all()
+    try:
+        batch = ItemBatch.parse_obj(documents)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+    return batch.__root__
@@ -20,16 +20,91 @@ To achieve this, import `JSONResponse`, and return your content there directly,
 If you return additional status codes and responses directly, they won't be included in the
 OpenAPI schema (the API docs), because FastAPI doesn't hav a way to know beforehand
 what you are going to return.
+
+The items are kept in a `ShardedItemStore`, so concurrent requests can't race while updating
+them. And to upsert many items at once, `PUT /items/` takes a list of items, validates the
+whole list, applies it in one pass, and returns the status (200 or 201) of each item.
 """
 
-from typing import Union
+import threading
+from typing import Dict, List, Tuple, Union
 
 from fastapi import Body, FastAPI, status
 from fastapi.responses import JSONResponse
+from pydantic import BaseModel
 
 app = FastAPI()
 
-items = {"foo": {"name": "Fighters", "size": 6}, "bar": {"name": "Tenders", "size": 3}}
+
+class ShardedItemStore:
+    """
+    A dict of items split in shards, each one with its own lock.
+
+    Path operations declared with normal `def` run in a threadpool, so two requests can
+    modify the items at the same time. Each shard is locked only while it's modified, so
+    requests for items in different shards don't wait for each other.
+    """
+
+    def __init__(self, shard_count: int = 16):
+        self.shard_count = shard_count
+        self.shards: List[Dict[str, dict]] = [{} for _ in range(shard_count)]
+        self.locks = [threading.Lock() for _ in range(shard_count)]
+
+    def shard_index(self, item_id: str) -> int:
+        return hash(item_id) % self.shard_count
+
+    def get(self, item_id: str) -> Union[dict, None]:
+        return self.shards[self.shard_index(item_id)].get(item_id)
+
+    def upsert(self, item_id: str, item: dict) -> Tuple[dict, bool]:
+        """
+        Update or insert an item, returning it and whether it was created.
+        """
+        index = self.shard_index(item_id)
+        with self.locks[index]:
+            return self._upsert(self.shards[index], item_id, item)
+
+    def bulk_upsert(self, items: List[Tuple[str, dict]]) -> List[Tuple[dict, bool]]:
+        """
+        Upsert many items, taking each shard's lock only once for the whole batch.
+
+        Results are in the same order as `items`.
+        """
+        by_shard: Dict[int, List[int]] = {}
+        for position, (item_id, _) in enumerate(items):
+            by_shard.setdefault(self.shard_index(item_id), []).append(position)
+        results: List[Tuple[dict, bool]] = [({}, False)] * len(items)
+        for index, positions in by_shard.items():
+            shard = self.shards[index]
+            with self.locks[index]:
+                for position in positions:
+                    item_id, item = items[position]
+                    results[position] = self._upsert(shard, item_id, item)
+        return results
+
+    @staticmethod
+    def _upsert(
+        shard: Dict[str, dict], item_id: str, values: dict
+    ) -> Tuple[dict, bool]:
+        item = shard.get(item_id)
+        if item is None:
+            shard[item_id] = item = dict(values)
+            return dict(item), True
+        item.update(values)
+        # A copy, so it can be serialized after the lock is released
+        return dict(item), False
+
+
+items = ShardedItemStore()
+items.bulk_upsert(
+    [("foo", {"name": "Fighters", "size": 6}), ("bar", {"name": "Tenders", "size": 3})]
+)
+
+
+class ItemUpsert(BaseModel):
+    id: str
+    name: Union[str, None] = None
+    size: Union[int, None] = None
 
 
 @app.put("/items/{item_id}")
@@ -38,12 +113,22 @@ async def upsert_item(
     name: Union[str, None] = Body(default=None),
     size: Union[int, None] = Body(default=None),
 ):
-    if item_id in items:
-        item = items[item_id]
-        item["name"] = name
-        item["size"] = size
-        return item
-    else:
-        item = {"name": name, "size": size}
-        items[item_id] = item
+    item, created = items.upsert(item_id, {"name": name, "size": size})
+    if created:
         return JSONResponse(status_code=status.HTTP_201_CREATED, content=item)
+    return item
+
+
+@app.put("/items/")
+def bulk_upsert_items(batch: List[ItemUpsert]):
+    results = items.bulk_upsert(
+        [(item.id, {"name": item.name, "size": item.size}) for item in batch]
+    )
+    return [
+        {
+            "id": upsert.id,
+            "status": status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+            "item": item,
+        }
+        for upsert, (item, created) in zip(batch, results)
+    ]
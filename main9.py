@@ -27,14 +27,22 @@ For example, you cannot put a Pydantic model in a `JSONResponse` without first c
 a `dict` with all the data types (like `datetime`, `UUID`, etc) converted to JSON-compatible types.
 
 For those cases, you can use the `jsonable_encoder` to convert your data before passing it to a response.
+
+But then the data is walked twice: once by `jsonable_encoder` to build a JSON-compatible `dict`,
+and again by `JSONResponse` to serialize that `dict`.
+
+Here, `ModelJSONResponse` hands the model to `orjson` directly. Each model class gets a small
+serializer, built the first time it's needed, that only collects the field values. `orjson`
+handles types like `datetime` and `UUID` by itself.
 """
 
 from datetime import datetime
-from typing import Union
+from operator import attrgetter
+from typing import Any, Callable, Dict, Type, Union
 
-from fastapi import FastAPI
+import orjson
+from fastapi import FastAPI, Response
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
 
@@ -46,8 +54,59 @@ class Item(BaseModel):
 
 app = FastAPI()
 
+_model_serializers: Dict[Type[BaseModel], Callable[[BaseModel], dict]] = {}
+
+
+def get_model_serializer(model_class: Type[BaseModel]) -> Callable[[BaseModel], dict]:
+    """
+    Build (once per model class) a function that maps a model to a `dict` of its fields.
+
+    The values are left as they are, `orjson` knows how to serialize `datetime`, `UUID`, etc.
+    """
+    serializer = _model_serializers.get(model_class)
+    if serializer is None:
+        names = tuple(model_class.__fields__)
+        keys = tuple(field.alias for field in model_class.__fields__.values())
+        if not names:
+
+            def serializer(model: BaseModel) -> dict:
+                return {}
+
+        elif len(names) == 1:
+            getter = attrgetter(names[0])
+
+            def serializer(model: BaseModel) -> dict:
+                return {keys[0]: getter(model)}
+
+        else:
+            getter = attrgetter(*names)
+
+            def serializer(model: BaseModel) -> dict:
+                return dict(zip(keys, getter(model)))
+
+        _model_serializers[model_class] = serializer
+    return serializer
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return get_model_serializer(type(obj))(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return jsonable_encoder(obj)
+
+
+class ModelJSONResponse(Response):
+    """
+    Serialize Pydantic models straight to JSON bytes, in one pass.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default)
+
 
 @app.put("/items/{id}")
 def update_item(id: str, item: Item):
-    json_compatible_item_data = jsonable_encoder(item)
-    return JSONResponse(content=json_compatible_item_data)
+    return ModelJSONResponse(content=item)
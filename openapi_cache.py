@@ -0,0 +1,253 @@
+"""Prebuilt OpenAPI schema artifact.
+
+By default, FastAPI generates the OpenAPI schema the first time somebody requests
+`/openapi.json`. That means every new worker pays for the full Pydantic schema generation on
+its first hit.
+
+Instead, you can build the schema once (for example, at deploy time), store it on disk as
+ready-to-send bytes (plain and gzipped), and let every worker load those bytes at startup.
+
+The artifact is keyed by a hash of the route table: each route's parameters, body,
+`response_model`, `responses` and dependencies, the source of the modules that declare the
+endpoints, dependencies and models (wherever they are), and the FastAPI and Pydantic versions.
+So if you add a path operation, change a model or upgrade FastAPI, the old artifact is simply
+not found and a new one gets built.
+
+Call `install_openapi_artifact(app)` after all the routes have been added (and after anything
+that changes them, like `use_route_names_as_operation_ids()` in `main2.py`).
+
+To prebuild the artifact at deploy time, run:
+
+    python -m openapi_cache main2:app
+"""
+
+import gzip
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import sys
+import typing
+from typing import Any, List, Set, Tuple
+
+import fastapi
+import pydantic
+from fastapi import FastAPI, Request, Response
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.routing import Route
+
+from prebuilt_response import etag_matches, parse_qvalues
+
+ARTIFACT_DIR = ".openapi"
+
+
+def add_source_file(obj: Any, source_files: Set[str]) -> None:
+    try:
+        source_file = inspect.getsourcefile(obj)
+    except TypeError:  # Built-in
+        return
+    # Not for code without a file (e.g. `python -c`)
+    if source_file and os.path.isfile(source_file):
+        source_files.add(source_file)
+
+
+def add_model_source_files(
+    annotation: Any, source_files: Set[str], seen: Set[int]
+) -> None:
+    """
+    Add the source files of the models in `annotation`, and of the models in their fields.
+    """
+    # By ID, annotations can be unhashable, and models can refer to themselves
+    if id(annotation) in seen:
+        return
+    seen.add(id(annotation))
+    for arg in typing.get_args(annotation):
+        add_model_source_files(arg, source_files, seen)
+    model = getattr(annotation, "__pydantic_model__", annotation)
+    if isinstance(model, type) and issubclass(model, BaseModel):
+        add_source_file(annotation, source_files)
+        for field in model.__fields__.values():
+            add_model_source_files(field.outer_type_, source_files, seen)
+    elif isinstance(annotation, type) and annotation.__module__ != "builtins":
+        # Enums and other classes in the schema
+        add_source_file(annotation, source_files)
+
+
+def dependant_fields(
+    dependant: Dependant, source_files: Set[str], seen: Set[int]
+) -> List[str]:
+    """
+    The parameters and body fields of `dependant` and its dependencies, as they affect the
+    schema, adding their source files (and their models') to `source_files`.
+    """
+    fields = []
+    if dependant.call is not None:
+        add_source_file(dependant.call, source_files)
+    for kind, params in (
+        ("path", dependant.path_params),
+        ("query", dependant.query_params),
+        ("header", dependant.header_params),
+        ("cookie", dependant.cookie_params),
+        ("body", dependant.body_params),
+    ):
+        for field in params:
+            fields.append(repr((kind, field, field.field_info)))
+            add_model_source_files(field.outer_type_, source_files, seen)
+    for requirement in dependant.security_requirements:
+        fields.append(
+            repr((requirement.security_scheme.model, sorted(requirement.scopes)))
+        )
+    for sub_dependant in dependant.dependencies:
+        fields.extend(dependant_fields(sub_dependant, source_files, seen))
+    return fields
+
+
+def route_table_hash(app: FastAPI) -> str:
+    """
+    Hash everything that ends up in the OpenAPI schema, without generating it.
+    """
+    digest = hashlib.sha256()
+    digest.update(
+        repr(
+            (
+                fastapi.__version__,
+                pydantic.VERSION,
+                app.title,
+                app.description,
+                app.version,
+                app.openapi_version,
+                app.openapi_tags,
+                app.servers,
+                app.terms_of_service,
+                app.contact,
+                app.license_info,
+            )
+        ).encode()
+    )
+    source_files: Set[str] = set()
+    seen: Set[int] = set()
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            digest.update(
+                repr(
+                    (
+                        route.path,
+                        sorted(route.methods),
+                        route.name,
+                        route.operation_id,
+                        route.include_in_schema,
+                        route.summary,
+                        route.description,
+                        route.response_description,
+                        route.deprecated,
+                        route.tags,
+                        route.status_code,
+                        route.response_model,
+                        route.responses,
+                        route.callbacks,
+                        route.openapi_extra,
+                        dependant_fields(route.dependant, source_files, seen),
+                    )
+                ).encode()
+            )
+            add_source_file(route.endpoint, source_files)
+            add_model_source_files(route.response_model, source_files, seen)
+            for response in route.responses.values():
+                if isinstance(response, dict) and "model" in response:
+                    add_model_source_files(response["model"], source_files, seen)
+    # A change in the source of a model (or anything else in its module) invalidates it
+    for source_file in sorted(source_files):
+        with open(source_file, mode="rb") as source:
+            digest.update(source.read())
+    return digest.hexdigest()
+
+
+def build_openapi_artifact(app: FastAPI, directory: str = ARTIFACT_DIR) -> str:
+    """
+    Generate the schema and write it (plain and gzipped) next to each other.
+
+    Files are written to a temporary name and then renamed, so concurrent workers never
+    see a half written artifact.
+    """
+    route_hash = route_table_hash(app)
+    body = json.dumps(app.openapi(), separators=(",", ":")).encode("utf-8")
+    os.makedirs(directory, exist_ok=True)
+    for suffix, content in ((".json", body), (".json.gz", gzip.compress(body))):
+        path = os.path.join(directory, route_hash + suffix)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, mode="wb") as artifact:
+            artifact.write(content)
+        os.replace(tmp_path, path)
+    return route_hash
+
+
+def load_openapi_artifact(
+    app: FastAPI, directory: str = ARTIFACT_DIR
+) -> Tuple[str, bytes, bytes]:
+    """
+    Load the artifact matching the current route table, building it if it's missing.
+    """
+    route_hash = route_table_hash(app)
+    path = os.path.join(directory, route_hash + ".json")
+    if not os.path.exists(path) or not os.path.exists(path + ".gz"):
+        build_openapi_artifact(app, directory)
+    with open(path, mode="rb") as artifact:
+        body = artifact.read()
+    with open(path + ".gz", mode="rb") as artifact:
+        gzipped_body = artifact.read()
+    return route_hash, body, gzipped_body
+
+
+def install_openapi_artifact(app: FastAPI, directory: str = ARTIFACT_DIR) -> None:
+    """
+    Serve `app.openapi_url` from the prebuilt artifact instead of generating it.
+
+    Should be called only after all routes have been added.
+    """
+    if not app.openapi_url:
+        return
+    _, body, gzipped_body = load_openapi_artifact(app, directory)
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    # Each encoding is a different representation, with its own ETag
+    gzip_etag = f'{etag[:-1]}-gzip"'
+    headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+    gzip_headers = {"ETag": gzip_etag, "Vary": "Accept-Encoding"}
+
+    async def openapi(request: Request) -> Response:
+        qvalues = parse_qvalues(request.headers.get("accept-encoding", ""))
+        default = qvalues.get("*")
+        gzip_quality = qvalues.get("gzip", qvalues.get("x-gzip", default or 0.0))
+        identity_quality = qvalues.get("identity", 1.0 if default is None else default)
+        use_gzip = gzip_quality > 0 and gzip_quality >= identity_quality
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and etag_matches(
+            if_none_match, gzip_etag if use_gzip else etag
+        ):
+            return Response(
+                status_code=304, headers=gzip_headers if use_gzip else headers
+            )
+        if use_gzip:
+            return Response(
+                gzipped_body,
+                media_type="application/json",
+                headers={**gzip_headers, "Content-Encoding": "gzip"},
+            )
+        return Response(body, media_type="application/json", headers=headers)
+
+    app.router.routes = [
+        route
+        for route in app.router.routes
+        if not (isinstance(route, Route) and route.path == app.openapi_url)
+    ]
+    app.add_route(app.openapi_url, openapi, include_in_schema=False)
+    # Anything else calling `app.openapi()` gets the prebuilt schema as well
+    app.openapi_schema = json.loads(body)
+
+
+if __name__ == "__main__":
+    module_name, _, app_name = sys.argv[1].partition(":")
+    target = getattr(importlib.import_module(module_name), app_name or "app")
+    print(build_openapi_artifact(target))
@@ -0,0 +1,184 @@
+"""Prebuilt responses for constant content.
+
+If a path operation always returns the same HTML or text, there's no need to encode it, compress
+it and compute its headers again on every request.
+
+`PrebuiltResponse` does all of that once, when it's created: it renders the body bytes, the
+`Content-Length` and a strong `ETag`, and keeps gzip (and brotli, if it's installed) variants
+next to it. Create it once at module level and return the same instance from your path
+operation. For each request it only picks the right variant (or answers `If-None-Match` with a
+`304 Not Modified`) and sends the prebuilt bytes.
+"""
+
+import gzip
+import hashlib
+from typing import Dict, List, NamedTuple, Tuple, Union
+
+from fastapi import Response
+from starlette.types import Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: nocover
+    brotli = None  # type: ignore
+
+
+def parse_qvalues(header: str) -> Dict[str, float]:
+    """
+    The quality (`q` parameter, 1 by default) of each item in an `Accept*` header.
+
+    Items are lowercased, and their other parameters are dropped.
+    """
+    qvalues: Dict[str, float] = {}
+    for item in header.split(","):
+        name, *params = item.split(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = min(1.0, max(0.0, float(value)))
+                except ValueError:
+                    quality = 0.0
+                break
+        qvalues[name] = quality
+    return qvalues
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Whether an `If-None-Match` header (a list of ETags, or `*`) matches `etag`.
+
+    The comparison is weak, as it is for `If-None-Match`: `W/"x"` matches `"x"`.
+    """
+    etag = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class PrebuiltVariant(NamedTuple):
+    etag: bytes
+    raw_headers: List[Tuple[bytes, bytes]]
+    not_modified_headers: List[Tuple[bytes, bytes]]
+    body_message: dict
+
+
+class PrebuiltResponse(Response):
+    """
+    A `Response` whose body and headers are rendered once and shared by all requests.
+
+    Because the same instance is sent for every request, anything set on it per request
+    (headers, cookies, background tasks) is ignored.
+    """
+
+    def __init__(
+        self,
+        content: Union[str, bytes],
+        status_code: int = 200,
+        headers: Union[Dict[str, str], None] = None,
+        media_type: Union[str, None] = None,
+    ):
+        super().__init__(content, status_code, headers, media_type)
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        encodings = {b"identity": self.body, b"gzip": gzip.compress(self.body, mtime=0)}
+        if brotli is not None:
+            encodings[b"br"] = brotli.compress(self.body)
+        # Tiny bodies can get bigger when compressed, those are always sent as they are
+        encodings = {
+            encoding: body
+            for encoding, body in encodings.items()
+            if encoding == b"identity" or len(body) < len(self.body)
+        }
+        self.variants: Dict[bytes, PrebuiltVariant] = {}
+        self._chosen_encodings: Dict[bytes, bytes] = {}
+        for encoding, body in encodings.items():
+            if encoding == b"identity":
+                etag = f'"{digest}"'.encode()
+            else:
+                etag = f'"{digest}-{encoding.decode()}"'.encode()
+            validators = [(b"etag", etag), (b"vary", b"accept-encoding")]
+            raw_headers = [
+                (name, value)
+                for name, value in self.raw_headers
+                if name not in (b"content-length", b"etag", b"vary")
+            ]
+            raw_headers += [(b"content-length", str(len(body)).encode()), *validators]
+            if encoding != b"identity":
+                raw_headers.append((b"content-encoding", encoding))
+            self.variants[encoding] = PrebuiltVariant(
+                etag,
+                raw_headers,
+                validators,
+                {"type": "http.response.body", "body": body},
+            )
+
+    def choose_encoding(self, accept_encoding: bytes) -> bytes:
+        encoding = self._chosen_encodings.get(accept_encoding)
+        if encoding is None:
+            encoding = self._negotiate(accept_encoding)
+            # Clients send only a handful of different values, but don't let it grow forever
+            if len(self._chosen_encodings) < 256:
+                self._chosen_encodings[accept_encoding] = encoding
+        return encoding
+
+    def _negotiate(self, accept_encoding: bytes) -> bytes:
+        qvalues = parse_qvalues(accept_encoding.decode("latin-1"))
+        if "x-gzip" in qvalues:
+            qvalues.setdefault("gzip", qvalues["x-gzip"])
+        default = qvalues.get("*")
+        best, best_quality = b"identity", 0.0
+        # On a tie, the first one wins: the smallest body
+        for encoding in (b"br", b"gzip", b"identity"):
+            if encoding not in self.variants:
+                continue
+            quality = qvalues.get(encoding.decode(), default)
+            if quality is None:
+                # Identity is always acceptable unless excluded, anything else only if listed
+                quality = 0.001 if encoding == b"identity" else 0.0
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        # When nothing is acceptable (not even identity), send it as it is anyway
+        return best
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        accept_encoding = b""
+        if_none_match = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value
+            elif name == b"if-none-match":
+                if_none_match = value
+        variant = self.variants[
+            self.choose_encoding(accept_encoding) if accept_encoding else b"identity"
+        ]
+        # Header lists are copied, middlewares are allowed to modify them in place
+        if if_none_match is not None and etag_matches(
+            if_none_match.decode("latin-1"), variant.etag.decode("latin-1")
+        ):
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": list(variant.not_modified_headers),
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": list(variant.raw_headers),
+            }
+        )
+        await send(variant.body_message)
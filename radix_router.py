@@ -0,0 +1,200 @@
+"""Compiled radix-tree routing.
+
+By default, the router checks `app.routes` one by one, running each route's regex against the
+request path until one of them matches. That's perfectly fine for a handful of path operations,
+but the cost grows with every route you add.
+
+Here we compile the route table into a tree keyed on the static segments of each path (and the
+HTTP method), so for each request only the few routes that could match get their regex checked.
+Path parameters (`{item_id}`, `{item_id:int}`, etc.) become a wildcard branch of the tree, and the
+route's own regex still does the final check and the conversion of the parameters.
+
+Routes are still tried in the order they were declared, so the behavior is the same as the
+default router, including "405 Method Not Allowed" and the trailing slash redirects.
+
+It's opt-in, call `use_radix_router(app)` once the app is created:
+
+    app = FastAPI()
+    use_radix_router(app)
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+from fastapi import FastAPI
+from fastapi.routing import APIRouter
+from starlette.datastructures import URL
+from starlette.responses import RedirectResponse
+from starlette.routing import BaseRoute, Match, Mount, Route, WebSocketRoute
+from starlette.types import Receive, Scope, Send
+
+
+class RadixNode:
+    __slots__ = ("static", "param", "exact", "prefix")
+
+    def __init__(self):
+        self.static: Dict[str, RadixNode] = {}
+        self.param: Optional[RadixNode] = None
+        # Routes ending at this node, by HTTP method (`None` for any method)
+        self.exact: Dict[Optional[str], List[int]] = {}
+        # Routes matching everything below this node (mounts and `{name:path}` params)
+        self.prefix: List[int] = []
+
+
+class RadixRouteIndex:
+    """
+    Index of the positions of routes in a route table, keyed by path segments.
+    """
+
+    def __init__(self, routes: Sequence[BaseRoute]):
+        self.root = RadixNode()
+        # Routes we can't index (e.g. `Host`), they are candidates for every request
+        self.fallback: List[int] = []
+        for position, route in enumerate(routes):
+            self.add(position, route)
+
+    def add(self, position: int, route: BaseRoute) -> None:
+        if isinstance(route, Mount):
+            self.insert(route.path, position, methods=None, is_prefix=True)
+        elif isinstance(route, Route):
+            self.insert(route.path, position, methods=route.methods, is_prefix=False)
+        elif isinstance(route, WebSocketRoute):
+            self.insert(route.path, position, methods=None, is_prefix=False)
+        else:
+            self.fallback.append(position)
+
+    def insert(
+        self, path: str, position: int, methods: Optional[set], is_prefix: bool
+    ) -> None:
+        node = self.root
+        for segment in path[1:].split("/") if path else []:
+            if "{" in segment:
+                if ":path}" in segment:
+                    # The parameter can swallow any number of segments
+                    is_prefix = True
+                    break
+                if node.param is None:
+                    node.param = RadixNode()
+                node = node.param
+            else:
+                node = node.static.setdefault(segment, RadixNode())
+        if is_prefix:
+            node.prefix.append(position)
+        else:
+            for method in methods or [None]:
+                node.exact.setdefault(method, []).append(position)
+
+    def lookup(self, path: str, method: Optional[str] = None) -> List[int]:
+        """
+        Positions of the routes that could match, in declaration order.
+
+        With a `method`, only routes for that method (or any method) are returned.
+        """
+        candidates = list(self.fallback)
+        self._walk(self.root, path[1:].split("/"), 0, method, candidates)
+        candidates.sort()
+        return candidates
+
+    def _walk(
+        self,
+        node: RadixNode,
+        segments: List[str],
+        index: int,
+        method: Optional[str],
+        candidates: List[int],
+    ) -> None:
+        candidates.extend(node.prefix)
+        if index == len(segments):
+            if method is None:
+                for positions in node.exact.values():
+                    candidates.extend(positions)
+            else:
+                candidates.extend(node.exact.get(method, ()))
+                candidates.extend(node.exact.get(None, ()))
+            return
+        segment = segments[index]
+        child = node.static.get(segment)
+        if child is not None:
+            self._walk(child, segments, index + 1, method, candidates)
+        if node.param is not None and segment:
+            self._walk(node.param, segments, index + 1, method, candidates)
+
+
+class RadixAPIRouter(APIRouter):
+    """
+    An `APIRouter` that resolves routes through a `RadixRouteIndex`.
+
+    The index is compiled on the first request and recompiled whenever routes are added.
+    """
+
+    _index: Optional[RadixRouteIndex] = None
+    _index_routes: Optional[list] = None
+    _index_size = 0
+
+    def get_index(self) -> RadixRouteIndex:
+        routes = self.routes
+        if (
+            self._index is None
+            or self._index_routes is not routes
+            or self._index_size != len(routes)
+        ):
+            self._index = RadixRouteIndex(routes)
+            self._index_routes = routes
+            self._index_size = len(routes)
+        return self._index
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        assert scope["type"] in ("http", "websocket", "lifespan")
+
+        if "router" not in scope:
+            scope["router"] = self
+
+        if scope["type"] == "lifespan":
+            await self.lifespan(scope, receive, send)
+            return
+
+        index = self.get_index()
+        routes = self.routes
+        path = scope["path"]
+
+        for position in index.lookup(path, scope.get("method")):
+            route = routes[position]
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                scope.update(child_scope)
+                await route.handle(scope, receive, send)
+                return
+
+        # Nothing for this method, look for a partial match to answer with a 405
+        for position in index.lookup(path):
+            route = routes[position]
+            match, child_scope = route.matches(scope)
+            if match != Match.NONE:
+                scope.update(child_scope)
+                await route.handle(scope, receive, send)
+                return
+
+        if scope["type"] == "http" and self.redirect_slashes and path != "/":
+            redirect_scope = dict(scope)
+            if path.endswith("/"):
+                redirect_scope["path"] = path.rstrip("/")
+            else:
+                redirect_scope["path"] = path + "/"
+
+            for position in index.lookup(redirect_scope["path"]):
+                match, _ = routes[position].matches(redirect_scope)
+                if match != Match.NONE:
+                    redirect_url = URL(scope=redirect_scope)
+                    response = RedirectResponse(url=str(redirect_url))
+                    await response(scope, receive, send)
+                    return
+
+        await self.default(scope, receive, send)
+
+
+def use_radix_router(app: FastAPI) -> None:
+    """
+    Make the app resolve its routes with the compiled radix tree.
+
+    Routes can still be added afterwards, the tree is recompiled when they change.
+    """
+    app.router.__class__ = RadixAPIRouter
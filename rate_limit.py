@@ -0,0 +1,287 @@
+"""In-process rate limiting, keyed by client IP, route or API key.
+
+Two algorithms, with the same interface: `limiter.hit(key)` records a request for `key` and
+returns 0 if it's allowed, or how many seconds to wait before the next one would be.
+
+- `TokenBucketLimiter`: `rate` requests per second on average, with bursts of up to `burst`.
+- `SlidingWindowLimiter`: at most `limit` requests in any `window` seconds, exactly (it keeps
+  the time of each request in the window, so it uses more memory per key).
+
+The state for each key is a small `__slots__` object in an LRU-ordered dict, so each request is
+O(1). There's no background cleanup: on each request the least recently used key is checked,
+and dropped if it's idle (its bucket is full again, or its window is empty), so dropping it
+doesn't change anything. `max_keys` is a hard limit on top of that.
+
+Each worker process has its own limiters. `SharedTokenBucketLimiter` keeps the token buckets in
+a memory-mapped file (in `/dev/shm` when available) instead, so all the worker processes on a
+host enforce the same limit (it needs `fcntl`, so it's only available on Unix).
+
+`RateLimit` is a dependency that applies a limiter and answers `429 Too Many Requests` (with a
+`Retry-After` header) when the limit is reached.
+
+API keys are only used as the key when they are valid: otherwise any client could get a fresh
+limit (and push the real clients' state out of the limiter) by sending a new made-up key with
+each request. Requests without a valid key are limited by client IP instead.
+"""
+
+import abc
+import hashlib
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Optional
+
+from fastapi import HTTPException, Request, status
+
+try:
+    import fcntl
+except ImportError:  # pragma: nocover
+    fcntl = None  # type: ignore
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class WindowLog:
+    __slots__ = ("hits",)
+
+    def __init__(self):
+        self.hits: Deque[float] = deque()
+
+
+class KeyedLimiter(abc.ABC):
+    """
+    Per-key state in LRU order, with idle keys dropped as new requests come.
+    """
+
+    def __init__(self, max_keys: int = 1_000_000):
+        self.max_keys = max_keys
+        self.entries: "OrderedDict[str, Any]" = OrderedDict()
+        # Normal `def` path operations and dependencies run in the threadpool
+        self.lock = threading.Lock()
+
+    @abc.abstractmethod
+    def new_entry(self, now: float) -> Any:
+        """
+        The state for a new key.
+        """
+
+    @abc.abstractmethod
+    def consume(self, entry: Any, now: float) -> float:
+        """
+        Record a request in `entry`, return 0 if it's allowed, or the seconds to wait.
+        """
+
+    @abc.abstractmethod
+    def is_idle(self, entry: Any, now: float) -> bool:
+        """
+        Whether `entry` is the same as a new one, so it can be dropped.
+        """
+
+    def hit(self, key: str, now: Optional[float] = None) -> float:
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            entries = self.entries
+            entry = entries.get(key)
+            if entry is None:
+                entry = entries[key] = self.new_entry(now)
+            else:
+                entries.move_to_end(key)
+            wait = self.consume(entry, now)
+            # Check two keys per request, so idle keys go away faster than new ones arrive
+            for _ in range(2):
+                oldest = next(iter(entries))
+                if oldest == key or not self.is_idle(entries[oldest], now):
+                    break
+                del entries[oldest]
+            if len(entries) > self.max_keys:
+                entries.popitem(last=False)
+        return wait
+
+
+class TokenBucketLimiter(KeyedLimiter):
+    def __init__(self, rate: float, burst: int, max_keys: int = 1_000_000):
+        super().__init__(max_keys)
+        self.rate = rate
+        self.burst = burst
+
+    def new_entry(self, now: float) -> TokenBucket:
+        return TokenBucket(self.burst, now)
+
+    def consume(self, entry: TokenBucket, now: float) -> float:
+        tokens = min(self.burst, entry.tokens + (now - entry.updated) * self.rate)
+        entry.updated = now
+        if tokens >= 1:
+            entry.tokens = tokens - 1
+            return 0
+        entry.tokens = tokens
+        return (1 - tokens) / self.rate
+
+    def is_idle(self, entry: TokenBucket, now: float) -> bool:
+        # Full again, same as a new bucket
+        return entry.tokens + (now - entry.updated) * self.rate >= self.burst
+
+
+class SlidingWindowLimiter(KeyedLimiter):
+    def __init__(self, limit: int, window: float, max_keys: int = 1_000_000):
+        super().__init__(max_keys)
+        self.limit = limit
+        self.window = window
+
+    def new_entry(self, now: float) -> WindowLog:
+        return WindowLog()
+
+    def consume(self, entry: WindowLog, now: float) -> float:
+        hits = entry.hits
+        start = now - self.window
+        while hits and hits[0] <= start:
+            hits.popleft()
+        if len(hits) < self.limit:
+            hits.append(now)
+            return 0
+        return hits[0] - start
+
+    def is_idle(self, entry: WindowLog, now: float) -> bool:
+        return not entry.hits or entry.hits[-1] <= now - self.window
+
+
+class SharedTokenBucketLimiter:
+    """
+    Token buckets in a memory-mapped file, shared by all the processes that open it.
+
+    The file is a hash table of `slots` buckets, in groups of `ways`: a key can only be in
+    its group, so finding it is O(1). When the group is full, a bucket that is full again (or
+    else the least recently updated one) is reused. Each group is locked with an `fcntl`
+    byte-range lock while it's updated, so processes only wait for each other on the same
+    group. Times come from `time.monotonic()`, which is the same for all the processes on a
+    host (on Linux).
+    """
+
+    slot = struct.Struct("<Qdd")  # key hash, tokens, updated
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: int,
+        slots: int = 1 << 20,
+        ways: int = 8,
+        directory: Optional[str] = None,
+    ):
+        if fcntl is None:
+            raise RuntimeError("SharedTokenBucketLimiter needs fcntl (Unix)")
+        self.rate = rate
+        self.burst = burst
+        self.ways = ways
+        self.groups = max(1, slots // ways)
+        if directory is None:
+            directory = (
+                "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+            )
+        self.path = os.path.join(directory, f"rate-limit-{name}")
+        size = self.groups * ways * self.slot.size
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self.fd).st_size < size:
+            # New pages are zeros, an empty slot has a key hash of 0
+            os.ftruncate(self.fd, size)
+        self.map = mmap.mmap(self.fd, size)
+        # `fcntl` locks are per process, the threads of this one need their own lock
+        self.lock = threading.Lock()
+
+    def hit(self, key: str, now: Optional[float] = None) -> float:
+        if now is None:
+            now = time.monotonic()
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        key_hash = int.from_bytes(digest, "little") | 1
+        group = key_hash % self.groups
+        slot = self.slot
+        start = group * self.ways * slot.size
+        with self.lock:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, 1, group)
+            try:
+                offset = reuse = None
+                oldest = math.inf
+                for position in range(start, start + self.ways * slot.size, slot.size):
+                    slot_hash, tokens, updated = slot.unpack_from(self.map, position)
+                    if slot_hash == key_hash:
+                        offset = position
+                        break
+                    if reuse is None and (
+                        slot_hash == 0
+                        or tokens + (now - updated) * self.rate >= self.burst
+                    ):
+                        reuse = position
+                    if updated < oldest:
+                        oldest, oldest_position = updated, position
+                if offset is None:
+                    offset = reuse if reuse is not None else oldest_position
+                    tokens, updated = self.burst, now
+                tokens = min(self.burst, tokens + (now - updated) * self.rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.rate
+                slot.pack_into(self.map, offset, key_hash, tokens, now)
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, group)
+        return wait
+
+    def close(self) -> None:
+        self.map.close()
+        os.close(self.fd)
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else ""
+
+
+def route_path(request: Request) -> str:
+    route = request.scope.get("route")
+    return route.path if route is not None else request.url.path
+
+
+def api_key(
+    is_valid: Callable[[str], bool], header: str = "x-api-key"
+) -> Callable[[Request], str]:
+    """
+    A key function for the API key in `header`, if `is_valid(key)`, or else the client IP.
+    """
+
+    def get_api_key(request: Request) -> str:
+        key = request.headers.get(header)
+        if key and is_valid(key):
+            return f"key:{key}"
+        return f"ip:{client_ip(request)}"
+
+    return get_api_key
+
+
+class RateLimit:
+    """
+    A dependency that limits the requests per key (by default, per client IP).
+    """
+
+    def __init__(self, limiter: Any, key: Callable[[Request], str] = client_ip):
+        self.limiter = limiter
+        self.key = key
+
+    async def __call__(self, request: Request) -> None:
+        wait = self.limiter.hit(self.key(request))
+        if wait:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
@@ -0,0 +1,168 @@
+"""Cached `response_model` validation and serialization.
+
+When a path operation returns the same data on every call, FastAPI still validates it against
+the `response_model`, and serializes it, on every call.
+
+Decorate the path operation function with a `ResponseCache` (below the route decorator), and
+use `CachedResponseRoute` as the route class (e.g. `app.router.route_class`). The validated and
+encoded response is then cached, as a `PrebuiltResponse` (see `prebuilt_response.py`), and
+reused when the function returns:
+
+- The same object (the same identity, e.g. a module level constant; call `invalidate()` after
+  modifying it), or
+- A `Versioned` value with the same version. The value can be a function, then it's only
+  called (to get the data) when the version is not cached yet.
+
+The cache is an LRU with `maxsize` entries, and `invalidate()` drops entries explicitly. As the
+cached response is shared, nothing can be added to it per request: a cached path operation (or
+its dependencies) can't declare a `Response` or `BackgroundTasks` parameter, that's an error
+when the route is created.
+"""
+
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple, Optional, Tuple
+
+from fastapi import Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.dependencies.models import Dependant
+from fastapi.exceptions import FastAPIError
+from fastapi.routing import APIRoute, request_response, serialize_response
+
+from prebuilt_response import PrebuiltResponse
+
+# (route ID, "identity", ID of the returned object) or (route ID, "version", version)
+CacheKey = Tuple[int, str, Hashable]
+
+
+class Versioned(NamedTuple):
+    version: Hashable
+    value: Any
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        # Source (the returned object, for identity keys) and response for each key
+        self.entries: "OrderedDict[CacheKey, Tuple[Any, PrebuiltResponse]]" = (
+            OrderedDict()
+        )
+        # `invalidate()` can be called from worker threads
+        self.lock = threading.Lock()
+
+    def __call__(self, endpoint: Callable[..., Any]) -> Callable[..., Any]:
+        endpoint.response_cache = self  # type: ignore
+        return endpoint
+
+    def get(self, key: CacheKey, source: Any) -> Optional[Response]:
+        with self.lock:
+            entry = self.entries.get(key)
+            # The source is kept alive in the entry, so its `id()` can't be reused meanwhile
+            if entry is None or entry[0] is not source:
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: CacheKey, source: Any, response: PrebuiltResponse) -> None:
+        with self.lock:
+            self.entries[key] = (source, response)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, version: Optional[Hashable] = None) -> None:
+        """
+        Drop the cached responses for `version`, or all of them.
+        """
+        with self.lock:
+            if version is None:
+                self.entries.clear()
+                return
+            for key in [key for key in self.entries if key[1:] == ("version", version)]:
+                del self.entries[key]
+
+
+def per_request_parameter(dependant: Dependant) -> Optional[str]:
+    """
+    The name of a `Response` or `BackgroundTasks` parameter in `dependant` (or any of its
+    dependencies), if there's one.
+    """
+    name = dependant.response_param_name or dependant.background_tasks_param_name
+    if name is not None:
+        return name
+    for sub_dependant in dependant.dependencies:
+        name = per_request_parameter(sub_dependant)
+        if name is not None:
+            return name
+    return None
+
+
+class CachedResponseRoute(APIRoute):
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, endpoint, **kwargs)
+        cache = getattr(endpoint, "response_cache", None)
+        if cache is not None:
+            name = per_request_parameter(self.dependant)
+            if name is not None:
+                # They would be set on the shared response, and never sent (or run)
+                raise FastAPIError(
+                    f"The cached path operation {self.name!r} can't have a Response or "
+                    f"BackgroundTasks parameter ({name!r})"
+                )
+            self.dependant.call = self.cached_call(cache, self.dependant.call)
+            self.app = request_response(self.get_route_handler())
+
+    def cached_call(
+        self, cache: ResponseCache, call: Callable[..., Any]
+    ) -> Callable[..., Any]:
+        is_coroutine = asyncio.iscoroutinefunction(call)
+        # Routes are not hashable, and they live as long as the app
+        route_id = id(self)
+        response_class = self.response_class
+        if isinstance(response_class, DefaultPlaceholder):
+            response_class = response_class.value
+
+        async def call_cached(**values: Any) -> Any:
+            if is_coroutine:
+                content = await call(**values)
+            else:
+                content = await run_in_threadpool(call, **values)
+            if isinstance(content, Response):
+                return content
+            if isinstance(content, Versioned):
+                key, source = (route_id, "version", content.version), None
+            else:
+                key, source = (route_id, "identity", id(content)), content
+            response = cache.get(key, source)
+            if response is None:
+                if isinstance(content, Versioned):
+                    content = content.value
+                    if asyncio.iscoroutinefunction(content):
+                        content = await content()
+                    elif callable(content):
+                        content = await run_in_threadpool(content)
+                serialized = await serialize_response(
+                    field=self.secure_cloned_response_field,
+                    response_content=content,
+                    include=self.response_model_include,
+                    exclude=self.response_model_exclude,
+                    by_alias=self.response_model_by_alias,
+                    exclude_unset=self.response_model_exclude_unset,
+                    exclude_defaults=self.response_model_exclude_defaults,
+                    exclude_none=self.response_model_exclude_none,
+                    is_coroutine=is_coroutine,
+                )
+                rendered = response_class(
+                    serialized, status_code=self.status_code or 200
+                )
+                response = PrebuiltResponse(
+                    rendered.body,
+                    status_code=rendered.status_code,
+                    media_type=rendered.media_type,
+                )
+                cache.set(key, source, response)
+            return response
+
+        return call_cached
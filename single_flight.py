@@ -0,0 +1,129 @@
+"""Single-flight calls: concurrent calls for the same key share one execution.
+
+A get-or-create path operation that checks if something exists and then creates it has a race:
+when several requests for the same ID arrive at the same time, all of them see that it doesn't
+exist yet, and all of them do the (maybe expensive) creation.
+
+`SingleFlight` runs the function only once per key at a time: the first caller (the leader)
+runs it, and the callers that arrive while it's running wait for it and get the same result
+(or the same exception). Once it finishes, the key is free again.
+
+Callers can be in the event loop (`await flight.run(...)`, from `async` path operations and
+dependencies) or in worker threads (`flight.run_sync(...)`, from normal `def` ones), and both
+kinds share the same in-flight calls. Async callers wait without blocking the event loop or
+holding a worker thread.
+
+When an async caller leads a call to a normal function, the function runs in the
+`SingleFlight`'s own threads, not in the threadpool: the threadpool could be full of `def`
+path operations waiting for that same call (with `run_sync()`), and none of them would ever
+finish. And a call, once started, always runs to the end: if the leader's request is cancelled
+(e.g. the client disconnected), the other callers still get its result.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+
+class SingleFlight:
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, "Future[Any]"] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Running `async` calls, so they are not garbage collected while they run
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    def _join(self, key: Hashable) -> Tuple["Future[Any]", bool]:
+        """
+        Return the in-flight call for `key`, and whether this caller has to run it.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def _finish(self, key: Hashable, future: "Future[Any]", result: Any) -> None:
+        with self._lock:
+            del self._calls[key]
+        future.set_result(result)
+
+    def _fail(self, key: Hashable, future: "Future[Any]", exc: BaseException) -> None:
+        with self._lock:
+            del self._calls[key]
+        future.set_exception(exc)
+
+    def _call(
+        self, key: Hashable, future: "Future[Any]", func: Callable[..., Any], *args: Any
+    ) -> None:
+        try:
+            result = func(*args)
+        except BaseException as exc:
+            self._fail(key, future, exc)
+        else:
+            self._finish(key, future, result)
+
+    async def _call_async(
+        self, key: Hashable, future: "Future[Any]", func: Callable[..., Any], *args: Any
+    ) -> None:
+        try:
+            result = await func(*args)
+        except BaseException as exc:
+            self._fail(key, future, exc)
+        else:
+            self._finish(key, future, result)
+
+    def _start(
+        self, key: Hashable, future: "Future[Any]", func: Callable[..., Any], *args: Any
+    ) -> None:
+        """
+        Start the call in the background, from the event loop.
+        """
+        try:
+            if asyncio.iscoroutinefunction(func):
+                task = asyncio.ensure_future(self._call_async(key, future, func, *args))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            else:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="single-flight"
+                    )
+                self._executor.submit(self._call, key, future, func, *args)
+        except BaseException as exc:
+            self._fail(key, future, exc)
+            raise
+
+    async def run(
+        self, key: Hashable, func: Callable[..., Any], *args: Any
+    ) -> Tuple[Any, bool]:
+        """
+        Run `func(*args)`, or wait for the call already running for `key`.
+
+        `func` can be a normal function (it's run in a thread) or an `async` one.
+        Returns the result and whether it was shared, that is, `False` only for the leader.
+        """
+        future, leader = self._join(key)
+        if leader:
+            self._start(key, future, func, *args)
+        # Shielded, so a caller that is cancelled doesn't cancel the call for the others
+        return await asyncio.shield(asyncio.wrap_future(future)), not leader
+
+    def run_sync(
+        self, key: Hashable, func: Callable[..., Any], *args: Any
+    ) -> Tuple[Any, bool]:
+        """
+        Like `run()`, but blocking, for code running in a worker thread.
+        """
+        future, leader = self._join(key)
+        if leader:
+            self._call(key, future, func, *args)
+        return future.result(), not leader
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
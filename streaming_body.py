@@ -0,0 +1,286 @@
+"""Streaming request bodies.
+
+`await request.body()` reads the whole request body into memory before you can start parsing it.
+For multi-megabyte uploads that means the full payload is buffered (and copied) first.
+
+Instead, you can read the body chunk by chunk with `request.stream()`, and feed each chunk to
+an incremental parser as it arrives. That way the size limit is enforced while reading (not
+after the whole payload is in memory), and the raw bytes are dropped as soon as they are
+parsed.
+
+- JSON: if the top-level value is an array, each element is parsed (and handed to you) as soon
+as it is complete, and the same for each member of a top-level object, so only the element (or
+member) being parsed is kept as text. Other top-level values (a single string or number) are
+only parsed at the end, as a whole.
+- YAML: the parser reads from the stream itself, in a worker thread, so the event loop is not
+blocked while it parses. The LibYAML based `CSafeLoader` is used when PyYAML was built with it.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import yaml
+from anyio import from_thread
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+
+DEFAULT_MAX_BODY_SIZE = 10 * 1024 * 1024
+
+_whitespace = json.decoder.WHITESPACE
+_decoder = json.JSONDecoder()
+_number_tail = re.compile(r"[0-9.eE+-]*")
+
+# The C loader is an order of magnitude faster, but it's only there if LibYAML is installed
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class IncrementalJSONParser:
+    """
+    Parse JSON from chunks of bytes.
+
+    `feed()` returns what is complete so far: the elements of a top-level array, the members
+    of a top-level object (as `(key, value)` tuples), or any other top-level value once the
+    last chunk is fed with `final=True`.
+    """
+
+    def __init__(self):
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        # Chunks of a top-level value that isn't an array or an object, decoded at the end
+        self._parts: List[str] = []
+        self.is_array: Optional[bool] = None
+        self.is_object = False
+        # What comes next in the array or object: "value", "key", "colon" or "comma"
+        self._expect = "value"
+        self._key: Optional[str] = None
+        self._seen_item = False
+        self._done = False
+        # Don't try to decode an incomplete item again until the buffer has grown this much
+        self._retry_size = 0
+
+    def feed(self, chunk: bytes, final: bool = False) -> List[Any]:
+        text = self._text_decoder.decode(chunk, final)
+        values: List[Any] = []
+        if self.is_array is False and not self.is_object:
+            self._parts.append(text)
+            if final:
+                values.append(self._decode_single("".join(self._parts)))
+            return values
+        buffer = self._buffer + text
+        position = _whitespace.match(buffer, 0).end()
+        if self.is_array is None:
+            if position == len(buffer):
+                self._buffer = ""
+                if final:
+                    values.append(self._decode_single(""))
+                return values
+            self.is_array = buffer[position] == "["
+            self.is_object = buffer[position] == "{"
+            if not self.is_array and not self.is_object:
+                self._buffer = ""
+                self._parts.append(buffer[position:])
+                if final:
+                    values.append(self._decode_single("".join(self._parts)))
+                return values
+            if self.is_object:
+                self._expect = "key"
+            position += 1
+        closing, first = ("}", "key") if self.is_object else ("]", "value")
+        while True:
+            position = _whitespace.match(buffer, position).end()
+            if position == len(buffer):
+                break
+            char = buffer[position]
+            if self._done:
+                raise ValueError("Extra data after the top-level value")
+            expect = self._expect
+            # Right after the opening bracket, or after an item (not after a comma)
+            if char == closing and (
+                expect == "comma" or not self._seen_item and expect == first
+            ):
+                self._done = True
+                position += 1
+            elif expect == "comma":
+                if char != ",":
+                    raise ValueError(f"Expecting ',' delimiter at {char!r}")
+                self._expect = first
+                position += 1
+            elif expect == "colon":
+                if char != ":":
+                    raise ValueError(f"Expecting ':' delimiter at {char!r}")
+                self._expect = "value"
+                position += 1
+            else:
+                if not final and len(buffer) - position < self._retry_size:
+                    break
+                try:
+                    value, end = _decoder.raw_decode(buffer, position)
+                except ValueError:
+                    if final:
+                        raise
+                    self._retry_size = 2 * (len(buffer) - position)
+                    break
+                # A number at the end of the buffer might continue in the next chunk
+                if not final and (
+                    end == len(buffer)
+                    or isinstance(value, (int, float))
+                    and _number_tail.fullmatch(buffer, end)
+                ):
+                    break
+                self._retry_size = 0
+                position = end
+                if expect == "key":
+                    if not isinstance(value, str):
+                        raise ValueError("Expecting a string key")
+                    self._key = value
+                    self._expect = "colon"
+                    continue
+                values.append((self._key, value) if self.is_object else value)
+                self._expect = "comma"
+                self._seen_item = True
+        self._buffer = buffer[position:]
+        if final and not self._done:
+            raise ValueError(
+                "Unterminated array" if self.is_array else "Unterminated object"
+            )
+        return values
+
+    def _decode_single(self, text: str) -> Any:
+        value, end = _decoder.raw_decode(text, _whitespace.match(text, 0).end())
+        if _whitespace.match(text, end).end() != len(text):
+            raise ValueError("Extra data after the top-level value")
+        self._parts = []
+        return value
+
+
+class StreamingBody:
+    """
+    Read a request body incrementally, enforcing `max_size` while reading.
+    """
+
+    def __init__(self, request: Request, max_size: int = DEFAULT_MAX_BODY_SIZE):
+        self.request = request
+        self.max_size = max_size
+        self.size = 0
+
+    def too_large(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Request body larger than {self.max_size} bytes",
+        )
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        content_length = self.request.headers.get("content-length")
+        if content_length:
+            try:
+                length = int(content_length)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid Content-Length header",
+                )
+            if length > self.max_size:
+                raise self.too_large()
+        async for chunk in self.request.stream():
+            self.size += len(chunk)
+            if self.size > self.max_size:
+                raise self.too_large()
+            if chunk:
+                yield chunk
+
+    async def iter_json(self) -> AsyncIterator[Any]:
+        """
+        Yield the elements of a top-level JSON array as soon as each one is complete.
+
+        Any other top-level value is yielded once, at the end of the body (an object is still
+        parsed member by member meanwhile).
+        """
+        parser = IncrementalJSONParser()
+        members: Dict[str, Any] = {}
+        try:
+            async for chunk in self.chunks():
+                for value in parser.feed(chunk):
+                    if parser.is_object:
+                        members[value[0]] = value[1]
+                    else:
+                        yield value
+            for value in parser.feed(b"", final=True):
+                if parser.is_object:
+                    members[value[0]] = value[1]
+                else:
+                    yield value
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Invalid JSON")
+        if parser.is_object:
+            yield members
+
+    async def load_json(self) -> Any:
+        parser = IncrementalJSONParser()
+        values: List[Any] = []
+        try:
+            async for chunk in self.chunks():
+                values.extend(parser.feed(chunk))
+            values.extend(parser.feed(b"", final=True))
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Invalid JSON")
+        if parser.is_array:
+            return values
+        if parser.is_object:
+            return dict(values)
+        return values[0]
+
+    def reader(self) -> "BlockingBodyReader":
+        """
+        A file-like object over the body, to be read from a worker thread.
+        """
+        return BlockingBodyReader(self.chunks())
+
+    async def load_yaml(self, loader: Any = YAML_LOADER) -> Any:
+        return await run_in_threadpool(self._run_yaml_loader, yaml.load, loader)
+
+    async def load_yaml_all(self, loader: Any = YAML_LOADER) -> List[Any]:
+        """
+        Parse a multi-document (`---`) YAML stream into a list of documents.
+        """
+        return await run_in_threadpool(self._run_yaml_loader, _load_all, loader)
+
+    def _run_yaml_loader(self, load: Any, loader: Any) -> Any:
+        try:
+            return load(self.reader(), Loader=loader)
+        except yaml.YAMLError:
+            raise HTTPException(status_code=422, detail="Invalid YAML")
+
+
+def _load_all(stream: Any, Loader: Any) -> List[Any]:
+    return list(yaml.load_all(stream, Loader=Loader))
+
+
+class BlockingBodyReader:
+    """
+    Blocking `read()` over an async iterator of chunks.
+
+    Each `read()` runs the next step of the iterator back in the event loop, so it can only
+    be used from a worker thread started by AnyIO (e.g. with `run_in_threadpool()`).
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks
+        self._pending = b""
+        self._exhausted = False
+
+    async def _next_chunk(self) -> bytes:
+        try:
+            return await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self._exhausted = True
+            return b""
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._exhausted and (size < 0 or len(self._pending) < size):
+            self._pending += from_thread.run(self._next_chunk)
+        if size < 0:
+            size = len(self._pending)
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
@@ -0,0 +1,82 @@
+"""A cache of verified tokens.
+
+Clients send the same bearer token with every request. Verifying it again each time (checking
+the signature, parsing the claims, loading the user) gives the same result until the token
+expires, or until something about the user changes.
+
+`VerifiedTokenCache` keeps the result of verifying a token, keyed by a digest of the token (so
+the tokens themselves are not kept in memory), until the token's `exp`, or at most `ttl`
+seconds, whatever comes first. It's an LRU bounded to `max_entries`. Entries are also indexed
+by user, to drop all the tokens of a user at once (e.g. when the user is disabled).
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Set
+
+
+class CachedToken(NamedTuple):
+    username: str
+    value: Any
+    expires_at: float
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_entries: int = 10_000, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[bytes, CachedToken]" = OrderedDict()
+        self.by_user: Dict[str, Set[bytes]] = {}
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[Any]:
+        key = self.key(token)
+        cached = self.entries.get(key)
+        if cached is None:
+            return None
+        if cached.expires_at <= time.time():
+            self._remove(key)
+            return None
+        self.entries.move_to_end(key)
+        return cached.value
+
+    def set(
+        self, token: str, username: str, value: Any, exp: Optional[float] = None
+    ) -> None:
+        """
+        Cache `value` for `token` until `exp` (a Unix timestamp, like the JWT claim).
+        """
+        expires_at = time.time() + self.ttl
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+        key = self.key(token)
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = CachedToken(username, value, expires_at)
+        self.by_user.setdefault(username, set()).add(key)
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+
+    def invalidate(self, token: str) -> None:
+        key = self.key(token)
+        if key in self.entries:
+            self._remove(key)
+
+    def invalidate_user(self, username: str) -> None:
+        for key in self.by_user.get(username, set()).copy():
+            self._remove(key)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.by_user.clear()
+
+    def _remove(self, key: bytes) -> None:
+        cached = self.entries.pop(key)
+        keys = self.by_user[cached.username]
+        keys.discard(key)
+        if not keys:
+            del self.by_user[cached.username]
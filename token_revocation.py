@@ -0,0 +1,175 @@
+"""Token revocation, with a Bloom filter in front of the store.
+
+To revoke a token before it expires, its ID (the `jti` claim) is stored in a revocation list,
+and every authenticated request has to check it. Querying the store on every request would add
+I/O to all of them, even though almost no token is ever revoked.
+
+`RevocationList` keeps the revoked IDs in SQLite (the authoritative store) and also adds them to
+an in-memory Bloom filter. A Bloom filter can tell for sure that an ID is *not* in it, with a
+few hashes and no I/O, so that's all the work done for the vast majority of requests. Only when
+the filter says an ID *might* be in it (it was revoked, or it's a false positive, about 1 in
+1,000 by default) is the store queried, in a worker thread.
+
+Each worker process has its own filter, and a token revoked by another process is only in the
+store. So the filter is rebuilt from the store every `purge_interval` seconds, in a worker
+thread, started by the first check after that time. Requests don't wait for it, unless the
+filter is more than `2 * purge_interval` seconds old (e.g. the process was idle). A token
+revoked by another process is then accepted by this one for at most `2 * purge_interval`
+seconds; the process that revoked it rejects it right away.
+
+A revoked ID is only needed until the token itself expires, so it's stored with the token's
+`exp`, and expired IDs are deleted from the store when the filter is rebuilt. The filter is
+also rebuilt bigger when there are more revoked IDs than it was sized for.
+"""
+
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: k positions from the two halves of a single digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return ((first + i * second) % size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        bits = self.bits
+        for position in self._positions(item):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        for position in self._positions(item):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class RevocationList:
+    def __init__(
+        self,
+        path: str = "revoked_tokens.db",
+        capacity: int = 100_000,
+        error_rate: float = 0.001,
+        purge_interval: float = 10.0,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.purge_interval = purge_interval
+        # Only used from worker threads, one query at a time
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS revoked_tokens "
+            "(jti TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+        )
+        self.connection.commit()
+        # IDs revoked by this process while the filter is being rebuilt
+        self.revoked_during_purge: List[str] = []
+        self.purge_thread: Optional[threading.Thread] = None
+        self.purge_thread_lock = threading.Lock()
+        self.purge_lock = threading.Lock()
+        self.purge()
+
+    def purge(self) -> None:
+        """
+        Delete the expired IDs from the store, and rebuild the filter with the rest.
+        """
+        # One at a time: a purge that started earlier but finishes later would replace the
+        # newer filter with one that misses the IDs revoked in between
+        with self.purge_lock:
+            with self.lock:
+                now = time.time()
+                with self.connection:
+                    self.connection.execute(
+                        "DELETE FROM revoked_tokens WHERE expires_at <= ?", (now,)
+                    )
+                rows = self.connection.execute(
+                    "SELECT jti FROM revoked_tokens"
+                ).fetchall()
+                self.revoked_during_purge = []
+            # Built without the lock, so store lookups don't wait for it
+            capacity = self.capacity
+            while capacity < 2 * len(rows):
+                capacity *= 2
+            bloom_filter = BloomFilter(capacity, self.error_rate)
+            for (jti,) in rows:
+                bloom_filter.add(jti)
+            with self.lock:
+                for jti in self.revoked_during_purge:
+                    bloom_filter.add(jti)
+                self.filter = bloom_filter
+                self.purged_at = now
+
+    def start_purge(self) -> threading.Thread:
+        """
+        Start `purge()` in a thread, unless it's already running, and return the thread.
+        """
+        with self.purge_thread_lock:
+            if self.purge_thread is None or not self.purge_thread.is_alive():
+                self.purge_thread = threading.Thread(target=self.purge, daemon=True)
+                self.purge_thread.start()
+            return self.purge_thread
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        """
+        Revoke the token with this ID, until `expires_at` (its `exp` claim).
+
+        Writes to the store, call it from a worker thread in `async` code.
+        """
+        with self.lock:
+            with self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO revoked_tokens (jti, expires_at) VALUES (?, ?)",
+                    (jti, expires_at),
+                )
+            self.filter.add(jti)
+            self.revoked_during_purge.append(jti)
+            full = self.filter.count > self.filter.capacity
+        if full:
+            self.purge()
+
+    def might_be_revoked(self, jti: str) -> bool:
+        return jti in self.filter
+
+    def lookup(self, jti: str) -> bool:
+        """
+        Check the store. Blocks, call it from a worker thread in `async` code.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM revoked_tokens WHERE jti = ? AND expires_at > ?",
+                (jti, time.time()),
+            ).fetchone()
+        return row is not None
+
+    async def is_revoked(self, jti: str) -> bool:
+        age = time.time() - self.purged_at
+        if age > self.purge_interval:
+            purge_thread = self.start_purge()
+            if age > 2 * self.purge_interval:
+                # Too old to trust, it could miss tokens revoked by other processes
+                await run_in_threadpool(purge_thread.join)
+        if not self.might_be_revoked(jti):
+            return False
+        return await run_in_threadpool(self.lookup, jti)
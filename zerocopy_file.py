@@ -0,0 +1,223 @@
+"""Zero-copy file responses with an open-file cache.
+
+`FileResponse` opens the file, stats it and computes its `ETag` on every request, and then
+reads it in chunks in Python to send it.
+
+`ZeroCopyFileResponse` keeps the open file, its size and its `ETag` in an LRU cache, so repeated
+requests for the same file skip all of that. The file is only stat'ed again (at most every
+`check_interval` seconds) to notice when it changes on disk.
+
+If the server supports the ASGI `http.response.zerocopysend` extension, the file is handed to
+the server, which sends it with `os.sendfile()`, without the data ever being copied into
+Python. Otherwise the file is read with `os.pread()`, in big chunks, in a worker thread.
+"""
+
+import hashlib
+import mimetypes
+import os
+import stat
+import time
+from collections import OrderedDict
+from email.utils import formatdate
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+import anyio
+from fastapi import Response
+from starlette.types import Receive, Scope, Send
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+class CachedFile:
+    """
+    An open file and the headers that depend on it.
+
+    The file stays open while responses are using it, even if it's evicted from the cache.
+    """
+
+    def __init__(self, path: str, file: BinaryIO, stat_result: os.stat_result):
+        self.path = path
+        self.file = file
+        self.fd = file.fileno()
+        self.size = stat_result.st_size
+        self.identity = (stat_result.st_ino, stat_result.st_mtime_ns, self.size)
+        self.checked_at = time.monotonic()
+        etag_base = f"{stat_result.st_mtime}-{self.size}"
+        self.etag = f'"{hashlib.md5(etag_base.encode()).hexdigest()}"'
+        self.last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        self.users = 0
+        self.evicted = False
+
+    def acquire(self) -> "CachedFile":
+        self.users += 1
+        return self
+
+    def release(self) -> None:
+        self.users -= 1
+        if self.evicted and self.users == 0:
+            self.file.close()
+
+    def evict(self) -> None:
+        self.evicted = True
+        if self.users == 0:
+            self.file.close()
+
+
+class OpenFileCache:
+    """
+    LRU cache of open files, invalidated when the file's mtime, size or inode change.
+    """
+
+    def __init__(self, max_files: int = 128, check_interval: float = 1.0):
+        self.max_files = max_files
+        self.check_interval = check_interval
+        self.files: "OrderedDict[str, CachedFile]" = OrderedDict()
+
+    def get(self, path: str) -> CachedFile:
+        """
+        Return the cached file for `path` (acquired, call `release()` when done).
+        """
+        cached = self.files.get(path)
+        now = time.monotonic()
+        if cached is not None:
+            if now - cached.checked_at < self.check_interval:
+                self.files.move_to_end(path)
+                return cached.acquire()
+            stat_result = os.stat(path)
+            if self._identity(stat_result) == cached.identity:
+                cached.checked_at = now
+                self.files.move_to_end(path)
+                return cached.acquire()
+            self._evict(path)
+        else:
+            stat_result = os.stat(path)
+        if not stat.S_ISREG(stat_result.st_mode):
+            raise RuntimeError(f"File at path {path} is not a file.")
+        file = open(path, mode="rb", buffering=0)
+        # Stat the open file, in case it was replaced between `stat()` and `open()`
+        cached = CachedFile(path, file, os.fstat(file.fileno()))
+        self.files[path] = cached
+        while len(self.files) > self.max_files:
+            self._evict(next(iter(self.files)))
+        return cached.acquire()
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        for cached_path in [path] if path is not None else list(self.files):
+            if cached_path in self.files:
+                self._evict(cached_path)
+
+    def _evict(self, path: str) -> None:
+        self.files.pop(path).evict()
+
+    @staticmethod
+    def _identity(stat_result: os.stat_result) -> Tuple[int, int, int]:
+        return (stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size)
+
+
+default_file_cache = OpenFileCache()
+
+
+class ZeroCopyFileResponse(Response):
+    chunk_size = 1024 * 1024
+
+    def __init__(
+        self,
+        path: Union[str, "os.PathLike[str]"],
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: Optional[str] = None,
+        filename: Optional[str] = None,
+        file_cache: OpenFileCache = default_file_cache,
+    ):
+        self.path = os.fspath(path)
+        self.status_code = status_code
+        self.filename = filename
+        self.file_cache = file_cache
+        if media_type is None:
+            media_type = mimetypes.guess_type(filename or self.path)[0] or "text/plain"
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+        if filename is not None:
+            self.headers.setdefault(
+                "content-disposition", f'attachment; filename="{filename}"'
+            )
+
+    def file_headers(self, cached: CachedFile) -> List[Tuple[bytes, bytes]]:
+        raw_headers = [
+            (name, value)
+            for name, value in self.raw_headers
+            if name not in (b"content-length", b"etag", b"last-modified")
+        ]
+        raw_headers += [
+            (b"content-length", str(cached.size).encode()),
+            (b"etag", cached.etag.encode()),
+            (b"last-modified", cached.last_modified.encode()),
+        ]
+        return raw_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        cached = self.file_cache.get(self.path)
+        try:
+            if_none_match = None
+            for name, value in scope["headers"]:
+                if name == b"if-none-match":
+                    if_none_match = value.decode("latin-1")
+            if if_none_match is not None and cached.etag in if_none_match:
+                await send(
+                    {
+                        "type": "http.response.start",
+                        "status": 304,
+                        "headers": [(b"etag", cached.etag.encode())],
+                    }
+                )
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.file_headers(cached),
+                }
+            )
+            if scope["method"] == "HEAD":
+                await send({"type": "http.response.body", "body": b""})
+            elif ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+                await send(
+                    {
+                        "type": ZEROCOPY_EXTENSION,
+                        "file": cached.file,
+                        "offset": 0,
+                        "count": cached.size,
+                        "more_body": False,
+                    }
+                )
+            else:
+                await self.send_chunks(cached, 0, cached.size, send)
+        finally:
+            cached.release()
+        if self.background is not None:
+            await self.background()
+
+    async def send_chunks(
+        self, cached: CachedFile, offset: int, count: int, send: Send
+    ) -> None:
+        """
+        Send `count` bytes of the file, starting at `offset`.
+
+        `os.pread()` doesn't move the file position, so concurrent responses can share the
+        same open file.
+        """
+        end = offset + count
+        while offset < end:
+            size = min(self.chunk_size, end - offset)
+            chunk = await anyio.to_thread.run_sync(os.pread, cached.fd, size, offset)
+            if not chunk:
+                # The file was truncated while sending it
+                break
+            offset += len(chunk)
+            if offset >= end:
+                await send({"type": "http.response.body", "body": chunk})
+                return
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})